@@ -24,6 +24,7 @@ Deployment:
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from utils.shared import ensure_schema_initialized
+from utils.responses import NumpyJSONResponse
 
 # Import modular route handlers
 from routes.health_routes import router as health_router
@@ -42,7 +43,8 @@ from routes.cleanup_routes import router as cleanup_router
 app = FastAPI(
     title="Nursing Home Analytics API",
     version="1.0.0",
-    description="Backend API for healthcare analytics dashboard with ML predictions and Power BI integration"
+    description="Backend API for healthcare analytics dashboard with ML predictions and Power BI integration",
+    default_response_class=NumpyJSONResponse,  # orjson encoding for every route
 )
 
 # Configure CORS middleware for frontend communication
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 import os
 
@@ -29,15 +30,17 @@ def _require_env(name: str) -> str:
     return value
 
 
-@dataclass
+@dataclass(frozen=True)
 class DBConfig:
     host: str
     port: int
     user: str
     password: str
     database: str
+    local_infile: bool = False  # allow LOAD DATA LOCAL INFILE for CSV imports
 
 
+@lru_cache(maxsize=1)
 def load_db_config() -> DBConfig:
     host = _require_env("DB_HOST")
     port_raw = _require_env("DB_PORT")
@@ -48,7 +51,10 @@ def load_db_config() -> DBConfig:
         port = int(port_raw)
     except Exception as e:
         raise RuntimeError(f"Invalid DB_PORT: {port_raw}") from e
-    return DBConfig(host=host, port=port, user=user, password=password, database=database)
+    # Optional; the server must also run with local_infile=ON
+    local_infile = (os.getenv("DB_LOCAL_INFILE") or "").strip().lower() in {"1", "true", "yes"}
+    return DBConfig(host=host, port=port, user=user, password=password, database=database,
+                    local_infile=local_infile)
 
 
 @dataclass
@@ -1,11 +1,11 @@
 """
 Cleanup routes for uploads directory.
 
-- Stats, dry-run preview, and execution endpoints
+- Stats, dry-run preview, and execution endpoints (inline or background)
 - Intended for admin use only in production
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 from utils.shared import UPLOAD_DIR
@@ -176,6 +176,45 @@ def run_cleanup(config: CleanupConfig):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post('/run/background', status_code=202)
+def run_cleanup_background(config: CleanupConfig, background_tasks: BackgroundTasks):
+    """Queue file cleanup and return immediately.
+    
+    Same operation as /run, but scheduled_cleanup runs after the response
+    is sent, so the caller does not wait on the directory scan and deletes.
+    Results are written to the server log instead of returned.
+    
+    Args:
+        config: Cleanup configuration (dry_run is not supported here)
+        
+    Returns:
+        202 Accepted with the configuration that was queued
+        
+    Example:
+        POST /api/cleanup/run/background
+        {
+            "max_age_hours": 24,
+            "max_size_mb": 500
+        }
+    """
+    if config.dry_run:
+        # Nothing to accept: reject rather than answer 202
+        raise HTTPException(status_code=400, detail="Use /api/cleanup/preview for dry-run operations")
+    
+    max_age_hours = config.max_age_hours or 24
+    max_size_mb = config.max_size_mb or 500
+    background_tasks.add_task(scheduled_cleanup, UPLOAD_DIR, max_age_hours, max_size_mb)
+    
+    return {
+        "ok": True,
+        "queued": True,
+        "config": {
+            "max_age_hours": max_age_hours,
+            "max_size_mb": max_size_mb,
+        }
+    }
+
+
 @router.delete('/all')
 def clear_all_uploads():
     """Delete ALL files in uploads directory (DANGEROUS).
@@ -3,6 +3,7 @@ Serve and lazily render cluster visualizations.
 
 - Heatmap, cluster sizes, demographics charts
 - Lazy render with file cache; optional refresh parameter
+- Parallel pre-render of all three charts
 """
 
 from fastapi import APIRouter, HTTPException, Query
@@ -17,6 +18,24 @@ from services import cluster_usage
 
 router = APIRouter()
 
+# (interpretations object, prepared arrays) so the three charts share one pass
+_cluster_arrays_cache = (None, None)
+
+
+def _cluster_arrays():
+    """Return plot-ready arrays for the currently loaded cluster interpretations.
+
+    The interpretations dict is replaced wholesale when models are (re)loaded,
+    so its identity is enough to decide whether the cached arrays are stale.
+    """
+    global _cluster_arrays_cache
+    interp = getattr(cluster_usage, "cluster_interpretations", {}) or {}
+    cached_interp, arrays = _cluster_arrays_cache
+    if cached_interp is not interp or arrays is None:
+        arrays = cluster_display.prepare_cluster_arrays(interp)
+        _cluster_arrays_cache = (interp, arrays)
+    return arrays
+
 
 def _render_if_missing(path, fn, *args, **kwargs):
     """Lazy render chart with double-checked locking pattern.
@@ -75,7 +94,7 @@ def get_heatmap(refresh: bool = Query(False)):
     _render_if_missing(
         HEATMAP_PATH,
         cluster_display.show_cluster_heatmap,
-        getattr(cluster_usage, "cluster_interpretations", {}) or {}
+        _cluster_arrays()
     )
     return FileResponse(HEATMAP_PATH, media_type="image/png")
 
@@ -109,7 +128,7 @@ def get_cluster_sizes(refresh: bool = Query(False)):
     _render_if_missing(
         SIZES_PATH,
         cluster_display.show_cluster_sizes,
-        getattr(cluster_usage, "cluster_interpretations", {}) or {}
+        _cluster_arrays()
     )
     return FileResponse(SIZES_PATH, media_type="image/png")
 
@@ -143,8 +162,40 @@ def get_demographics(refresh: bool = Query(False)):
     _render_if_missing(
         DEMOS_PATH,
         cluster_display.show_demographics,
-        getattr(cluster_usage, "cluster_interpretations", {}) or {}
+        _cluster_arrays()
     )
     return FileResponse(DEMOS_PATH, media_type="image/png")
 
 
+@router.post("/cluster/display/render")
+def render_all(refresh: bool = Query(False)):
+    """Pre-render every cluster chart in parallel.
+    
+    Renders the heatmap, cluster sizes and demographics charts in separate
+    worker processes, so the dashboard's three image requests are then
+    served from disk instead of each waiting on matplotlib in turn.
+    
+    Args:
+        refresh: If True, discard existing charts and render them again
+    
+    Returns:
+        dict: ok flag and the chart files now available
+    
+    Raises:
+        HTTPException: 500 if ML models fail to load or rendering fails
+    """
+    ensure_models_loaded()
+    paths = (HEATMAP_PATH, SIZES_PATH, DEMOS_PATH)
+    with DISPLAY_RENDER_LOCK:
+        if refresh:
+            for path in paths:
+                try:
+                    path.unlink(missing_ok=True)
+                except Exception:
+                    pass
+        if not all(path.exists() for path in paths):
+            cluster_display.render_all_charts(_cluster_arrays())
+    missing = [path.name for path in paths if not path.exists()]
+    if missing:
+        raise HTTPException(status_code=500, detail=f"Failed to render {', '.join(missing)}")
+    return {"ok": True, "charts": [path.name for path in paths]}
@@ -6,14 +6,12 @@ ML clustering/classification endpoints.
 """
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
 from typing import Any, Dict, List
-import numpy as np
 from pydantic import BaseModel
 
 from services import cluster_usage
-from utils.shared import ensure_models_loaded, predictor
-from fastapi.encoders import jsonable_encoder
+from utils.shared import ensure_models_loaded
+from utils.responses import NumpyJSONResponse
 
 router = APIRouter()
 
@@ -56,16 +54,8 @@ async def predict_cluster(payload: PatientPayload):
             cluster_interpretations=getattr(cluster_usage, "cluster_interpretations", {}) or {},
             patient_id=patient_id,
         )
-        # Convert NumPy types to JSON-serializable format
-        safe = jsonable_encoder(
-            result,
-            custom_encoder={
-                np.integer: int,
-                np.floating: float,
-                np.ndarray: lambda v: v.tolist(),
-            },
-        )
-        return JSONResponse(content=safe)
+        # orjson encodes the NumPy values in the result directly
+        return NumpyJSONResponse(content=result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Classification failed: {e}")
 
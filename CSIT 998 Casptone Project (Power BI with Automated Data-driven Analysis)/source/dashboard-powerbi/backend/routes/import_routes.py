@@ -5,23 +5,103 @@ CSV import workflow: preview and commit.
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Body
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+import csv
+import math
+import os
+import tempfile
 import pandas as pd
+import pymysql
 import logging
 
 from utils.shared import (
     UPLOAD_DIR,
+    build_csv_to_db_mapping,
+    bulk_load_enabled,
     get_db_connection,
     get_db_columns,
     map_expected_to_db_columns,
     map_csv_headers_to_expected,
     EXPECTED_COLUMNS,
-    parse_date_to_iso,
+    parse_date_series,
 )
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Rows per executemany call; pymysql folds each batch into multi-row INSERTs
+IMPORT_BATCH_ROWS = 1000
+
+# MySQL errors meaning LOAD DATA LOCAL is disabled on the server or client
+_LOCAL_INFILE_REFUSED = {1148, 2068, 3948}
+
+
+def _load_data_field(value) -> str:
+    """Render one value for the LOAD DATA file: bare NULL, bare float, else quoted"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, float):
+        return repr(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _load_data_local(cursor, rows, cols_sql: str) -> Optional[int]:
+    """Send rows to `data` in one LOAD DATA LOCAL INFILE statement.
+
+    Fields are enclosed in double quotes with no escape character, so the
+    bare word NULL loads as SQL NULL while the string "NULL" stays text.
+    Returns the rows loaded, or None when the server refuses local files.
+
+    LOAD DATA LOCAL behaves as if IGNORE were given: bad values and
+    duplicate keys only raise warnings. Any warning or missing row is
+    turned into an error so the caller's rollback/restore still runs.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix='.load.csv', dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            for row in rows:
+                f.write(','.join(map(_load_data_field, row)))
+                f.write('\n')
+        cursor.execute(
+            "LOAD DATA LOCAL INFILE %s INTO TABLE `data` CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' ({cols_sql})",
+            (tmp_path,),
+        )
+        loaded = cursor.rowcount
+        warnings = cursor.connection.show_warnings()
+        if warnings or loaded != len(rows):
+            detail = f"; first warning: {warnings[0][2]}" if warnings else ""
+            raise ValueError(f"LOAD DATA loaded {loaded} of {len(rows)} rows "
+                             f"with {len(warnings or ())} warnings{detail}")
+        return loaded
+    except pymysql.err.OperationalError as e:
+        if e.args and e.args[0] in _LOCAL_INFILE_REFUSED:
+            logger.warning(f"LOAD DATA LOCAL refused, falling back to INSERT batches: {e}")
+            return None
+        raise
+    finally:
+        os.unlink(tmp_path)
+
+
+def _read_upload_csv(path) -> pd.DataFrame:
+    """Parse an uploaded CSV/TSV, sniffing the delimiter.
+
+    Sniffs the header line exactly as read_csv(sep=None) does, but hands the
+    dialect to the C parser instead of parsing every row in pure Python.
+    Falls back to the original python-engine reads if that fails.
+    """
+    try:
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            dialect = csv.Sniffer().sniff(f.readline())
+        return pd.read_csv(path, dialect=dialect, engine='c', low_memory=False)
+    except Exception:
+        pass
+    try:
+        return pd.read_csv(path, sep=None, engine='python')
+    except Exception:
+        return pd.read_csv(path, sep='\t', engine='python')
+
 
 @router.post('/api/import/preview')
 async def import_preview(file: UploadFile = File(...)):
@@ -44,13 +124,10 @@ async def import_preview(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f'Failed to save temp file: {e}')
 
     try:
-        df = pd.read_csv(temp_path, sep=None, engine='python')
-    except Exception:
-        try:
-            df = pd.read_csv(temp_path, sep='\t', engine='python')
-        except Exception as e:
-            temp_path.unlink(missing_ok=True)
-            raise HTTPException(status_code=400, detail=f'Failed to parse CSV: {e}')
+        df = _read_upload_csv(temp_path)
+    except Exception as e:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f'Failed to parse CSV: {e}')
 
     csv_cols = list(map(str, df.columns.tolist()))
     csv_map = map_csv_headers_to_expected(csv_cols)
@@ -111,10 +188,7 @@ def import_commit(payload: Dict[str, Any] = Body(default={})):
 
     # Re-parse CSV (token could have been from hours ago)
     try:
-        try:
-            df = pd.read_csv(path, sep=None, engine='python')
-        except Exception:
-            df = pd.read_csv(path, sep='\t', engine='python')
+        df = _read_upload_csv(path)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f'Failed to parse CSV: {e}')
 
@@ -150,11 +224,11 @@ def import_commit(payload: Dict[str, Any] = Body(default={})):
             cursor.execute("TRUNCATE TABLE `data`")
             conn.commit()
 
-        # Prepare column mapping for insertion
+        # Prepare column mapping for insertion; both sides were validated
+        # complete above, so this has one entry per expected column, in order
         ordered_expected = EXPECTED_COLUMNS[:]
-        insert_cols = [db_map[exp] for exp in ordered_expected]
-        rename_map = {csv_map[exp]: exp for exp in ordered_expected}
-        work_df = df.rename(columns=rename_map)
+        csv_to_db = build_csv_to_db_mapping(csv_cols, db_cols)
+        insert_cols = list(csv_to_db.values())
 
         def to_num(val):
             """Convert value to number with None fallback for invalid/empty values."""
@@ -162,36 +236,49 @@ def import_commit(payload: Dict[str, Any] = Body(default={})):
                 if val is None or str(val).strip() == '':
                     return None
                 n = float(val)
-                import pandas as pd
-                if pd.isna(n):
-                    return None
-                return n
+                # NaN/inf have no MySQL representation
+                return n if math.isfinite(n) else None
             except Exception:
                 return None
 
-        # Transform DataFrame rows to database format
+        # Transform DataFrame rows to database format (plain tuples in
+        # EXPECTED_COLUMNS order; itertuples avoids building a Series per row).
+        # Date columns are parsed column-wise, once per distinct value
+        rows_df = df[list(csv_to_db)].copy()
+        rows_df.columns = ordered_expected
+        rows_df['Start date'] = parse_date_series(rows_df['Start date'])
+        rows_df['End date'] = parse_date_series(rows_df['End date'])
         values = []
-        for _, row in work_df.iterrows():
-            person_id = None if pd.isna(row.get('PersonID')) else str(row.get('PersonID')).strip()
-            start_date = parse_date_to_iso(row.get('Start date'))
-            end_date = parse_date_to_iso(row.get('End date'))
-            mrf = None if pd.isna(row.get('M-Risk Factors')) else str(row.get('M-Risk Factors')).strip()
-            gender = None if pd.isna(row.get('Gender')) else str(row.get('Gender')).strip()
-            age = to_num(row.get('Age'))
-            mna = to_num(row.get('MNA'))
-            bmi = to_num(row.get('BMI'))
-            weight = to_num(row.get('Weight'))
-            values.append((person_id, start_date, end_date, mrf, gender, age, mna, bmi, weight))
-
-        # Batch insert all rows
+        for (person_id, start_date, end_date, mrf, gender,
+             age, mna, bmi, weight) in rows_df.itertuples(index=False, name=None):
+            values.append((
+                None if pd.isna(person_id) else str(person_id).strip(),
+                start_date,
+                end_date,
+                None if pd.isna(mrf) else str(mrf).strip(),
+                None if pd.isna(gender) else str(gender).strip(),
+                to_num(age),
+                to_num(mna),
+                to_num(bmi),
+                to_num(weight),
+            ))
+
+        # Batch insert in chunks, committed once so the import stays atomic
         placeholders = ','.join(['%s'] * len(insert_cols))
         cols_sql = ','.join([f"`{c}`" for c in insert_cols])
         sql = f"INSERT INTO `data` ({cols_sql}) VALUES ({placeholders})"
         if values:
             try:
-                cursor.executemany(sql, values)
+                # LOAD DATA skips per-statement parsing when enabled (DB_LOCAL_INFILE)
+                loaded = _load_data_local(cursor, values, cols_sql) if bulk_load_enabled() else None
+                if loaded is not None:
+                    inserted = loaded
+                else:
+                    for start in range(0, len(values), IMPORT_BATCH_ROWS):
+                        batch = values[start:start + IMPORT_BATCH_ROWS]
+                        cursor.executemany(sql, batch)
+                        inserted += cursor.rowcount or len(batch)
                 conn.commit()
-                inserted = cursor.rowcount or len(values)
             except Exception as e:
                 # Rollback: restore from backup if overwrite mode
                 if mode == 'overwrite' and backup_table:
@@ -5,11 +5,9 @@ Risk prediction endpoints (batch).
 """
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
 from typing import Any, Dict, List
-import numpy as np
-from utils.shared import predictor
+from utils.shared import get_predictor
+from utils.responses import NumpyJSONResponse
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -41,26 +39,23 @@ async def predict_risk_batch(patients: List[PatientInput]):
     """Summary: Batch risk prediction.
     Returns: list of results per patient"""
     try:
-        results = []
-        for patient in patients:
-            result = predictor.predict_patient_risk(
-                age=patient.age,
-                gender=patient.gender,
-                patient_conditions=patient.conditions_dict,
-                include_details=False
-            )
-            results.append(result)
-
-        # Convert NumPy types to JSON-serializable format
-        safe = jsonable_encoder(
-            results,
-            custom_encoder={
-                np.integer: int,
-                np.floating: float,
-                np.ndarray: lambda v: v.tolist(),
-            },
+        # Model loads on first use; a missing model surfaces as the 500 below.
+        # One stacked SVD transform / model call for the whole request;
+        # results come back in input order
+        results = get_predictor().predict_patient_risk_batch(
+            [
+                {
+                    "age": patient.age,
+                    "gender": patient.gender,
+                    "patient_conditions": patient.conditions_dict,
+                }
+                for patient in patients
+            ],
+            include_details=False,
         )
-        return JSONResponse(content=safe)
+
+        # orjson encodes the NumPy values in the results directly
+        return NumpyJSONResponse(content=results)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {e}")
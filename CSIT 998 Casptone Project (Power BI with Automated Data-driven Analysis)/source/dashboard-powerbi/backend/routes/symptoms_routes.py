@@ -4,9 +4,10 @@ Symptom management routes.
 - Insert/list/update/rename/delete symptoms; extract from risk factors
 """
 
+import pandas as pd
 from fastapi import APIRouter, HTTPException, Body, Query
 from typing import Any, Dict, Optional, Set
-from utils.shared import get_db_connection, normalize_token, parse_risk_factors, get_db_columns
+from utils.shared import get_db_connection, normalize_token, parse_risk_factors_series, get_db_columns
 
 router = APIRouter()
 
@@ -331,10 +332,11 @@ def process_risk_factors(dry_run: bool = Query(default=True), risk_col: str = Qu
             """Normalize for case-insensitive comparison."""
             return (s or '').strip().lower()
 
-        # Parse and deduplicate symptoms (preserves first occurrence capitalization)
+        # Parse and deduplicate symptoms (preserves first occurrence capitalization).
+        # Many rows repeat the same risk text, so only distinct cells are visited
+        risk_cells = pd.Series([row.get('risk') for row in rows], dtype=object).drop_duplicates()
         found_map: Dict[str, str] = {}
-        for row in rows:
-            items = parse_risk_factors(row.get('risk'))
+        for items in parse_risk_factors_series(risk_cells):
             for it in items:
                 n = norm(it)
                 if n and n not in found_map:
@@ -17,11 +17,62 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import os
+import math
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import load_powerbi_config
 
-def get_access_token(config):
+try:
+    # Faster JSON decoding for large tenants; stdlib json is used otherwise
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+PBI_API_ROOT = "https://api.powerbi.com/v1.0/myorg"
+PAGE_SIZE = 5000
+REQUEST_TIMEOUT = 30
+
+
+def _build_session():
+    """Session that retries throttled (429) and transient 5xx/timeout failures
+    with exponential backoff, honouring Retry-After"""
+    retry = Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+        allowed_methods=['GET', 'POST'],
+        raise_on_status=False,  # let raise_for_status() report the final response
+    )
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=retry))
+    return session
+
+
+_session = _build_session()
+
+@lru_cache(maxsize=1)
+def _config():
+    """Power BI config, parsed once per process.
+
+    Call ``_config.cache_clear()`` to pick up changed environment variables.
+    """
+    return load_powerbi_config()
+
+
+def _json(response):
+    """Decode a JSON response body (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def get_access_token(config=None):
     """Get Power BI access token"""
+    config = config or _config()
     url = f"https://login.microsoftonline.com/{config.tenant_id}/oauth2/v2.0/token"
     
     data = {
@@ -31,29 +82,68 @@ def get_access_token(config):
         'scope': 'https://analysis.windows.net/powerbi/api/.default'
     }
     
-    response = requests.post(url, data=data)
+    response = _session.post(url, data=data, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return _json(response)['access_token']
+
+
+def _get_page(url, headers, top, skip, count=False, query=""):
+    """Fetch a single OData page"""
+    page_url = f"{url}?$top={top}&$skip={skip}{query}"
+    if count:
+        page_url += "&$count=true"
+    response = _session.get(page_url, headers=headers, timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    return response.json()['access_token']
+    return _json(response)
+
+
+def _fetch_all(url, token, page_size=PAGE_SIZE, query=""):
+    """Fetch every item of an OData collection.
+
+    The first page also returns ``@odata.count``; the remaining pages are
+    then requested concurrently instead of one after another.
+    """
+    headers = {'Authorization': f'Bearer {token}'}
+    first = _get_page(url, headers, page_size, 0, count=True, query=query)
+    items = list(first.get('value', []))
+
+    total = first.get('@odata.count')
+    if total is None or total <= len(items):
+        return items
+
+    n_pages = math.ceil(total / page_size)
+    with ThreadPoolExecutor(max_workers=min(8, n_pages - 1)) as pool:
+        pages = pool.map(
+            lambda i: _get_page(url, headers, page_size, i * page_size, query=query),
+            range(1, n_pages),
+        )
+        for page in pages:
+            items.extend(page.get('value', []))
+    return items
 
 
 def list_workspaces(token):
     """List all workspaces"""
-    url = "https://api.powerbi.com/v1.0/myorg/groups"
-    headers = {'Authorization': f'Bearer {token}'}
-    
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()['value']
+    return _fetch_all(f"{PBI_API_ROOT}/groups", token)
 
 
 def list_datasets(token, workspace_id):
     """List all datasets in the specified workspace"""
-    url = f"https://api.powerbi.com/v1.0/myorg/groups/{workspace_id}/datasets"
-    headers = {'Authorization': f'Bearer {token}'}
-    
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()['value']
+    return _fetch_all(f"{PBI_API_ROOT}/groups/{workspace_id}/datasets", token)
+
+
+def list_workspaces_with_datasets(token):
+    """List all workspaces with their datasets inlined (admin API, one round trip).
+
+    Returns None when the service principal lacks Power BI admin scope
+    (401/403), so callers can fall back to list_workspaces + list_datasets.
+    """
+    try:
+        return _fetch_all(f"{PBI_API_ROOT}/admin/groups", token, query="&$expand=datasets")
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code in (401, 403):
+            return None
+        raise
 
 
 def main():
@@ -65,7 +155,7 @@ def main():
     try:
         # Load configuration
         print("Loading configuration...")
-        config = load_powerbi_config()
+        config = _config()
         print(f"✅ Tenant ID: {config.tenant_id}")
         print(f"✅ Client ID: {config.client_id}")
         print()
@@ -78,7 +168,11 @@ def main():
         
         # List Workspaces
         print("Fetching workspaces...")
-        workspaces = list_workspaces(token)
+        workspaces = list_workspaces_with_datasets(token)
+        datasets_inline = workspaces is not None
+        if not datasets_inline:
+            print("Admin API not available, listing workspaces and datasets separately")
+            workspaces = list_workspaces(token)
         print(f"✅ Found {len(workspaces)} workspace(s)")
         print()
         
@@ -117,7 +211,10 @@ def main():
         # List datasets
         workspace_id = selected_ws['id']
         print(f"Fetching datasets in workspace '{selected_ws.get('name', 'Unnamed')}'...")
-        datasets = list_datasets(token, workspace_id)
+        if datasets_inline:
+            datasets = selected_ws.get('datasets') or []
+        else:
+            datasets = list_datasets(token, workspace_id)
         print(f"Found {len(datasets)} dataset(s)")
         print()
         
@@ -6,7 +6,21 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import io
+import json
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, List, Tuple
+from PIL import Image, ImageDraw, ImageFont
 
 # Use shared absolute output paths to ensure files are saved where the API serves them
 try:
@@ -17,165 +31,344 @@ except Exception:
     SIZES_PATH = Path('cluster_sizes.png')
     DEMOS_PATH = Path('demographics_comparison.png')
 
+# Placeholder images are static, so they are drawn with Pillow instead of
+# going through a full matplotlib figure/layout pass
+_PLACEHOLDER_SIZE = (1500, 900)  # matches the old 10x6 in figure at 150 dpi
+_PLACEHOLDER_BG = '#f3f4f6'
+_PLACEHOLDER_HINT = 'Please verify models and data are properly loaded'
+
+# Above this many condition x cluster cells the heatmap is drawn without
+# per-cell value labels
+_HEATMAP_ANNOT_MAX_CELLS = 100
+
+
+@lru_cache(maxsize=4)
+def _placeholder_font(bold: bool, size: int):
+    name = 'DejaVuSans-Bold.ttf' if bold else 'DejaVuSans.ttf'
+    try:
+        return ImageFont.truetype(str(Path(matplotlib.get_data_path()) / 'fonts' / 'ttf' / name), size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=16)
+def _placeholder_bytes(message: str) -> bytes:
+    """Render the placeholder PNG for ``message`` once and cache the bytes"""
+    width, height = _PLACEHOLDER_SIZE
+    img = Image.new('RGB', _PLACEHOLDER_SIZE, _PLACEHOLDER_BG)
+    draw = ImageDraw.Draw(img)
+    draw.text((width / 2, height * 0.45), message, fill='#374151',
+              font=_placeholder_font(True, 58), anchor='mm')
+    draw.text((width / 2, height * 0.60), _PLACEHOLDER_HINT, fill='#6b7280',
+              font=_placeholder_font(False, 29), anchor='mm')
+    buf = io.BytesIO()
+    img.save(buf, 'PNG', optimize=True)
+    return buf.getvalue()
+
+
 # Visualization functions (rely on passed-in cluster_interpretations from caller)
 def _write_placeholder_png(path: Path | str, message: str):
     target_path = Path(path)
-    plt.figure(figsize=(10, 6), facecolor='#f3f4f6')
-    ax = plt.gca()
-    ax.set_facecolor('#f3f4f6')
-    plt.text(0.5, 0.55, message, ha='center', va='center', fontsize=28, color='#374151', fontweight='bold')
-    plt.text(0.5, 0.40, 'Please verify models and data are properly loaded', ha='center', va='center', fontsize=14, color='#6b7280')
-    for spine in ax.spines.values():
-        spine.set_visible(True)
-        spine.set_color('#9ca3af')
-        spine.set_linewidth(1.5)
-    plt.axis('off')
-    plt.tight_layout()
     target_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(str(target_path), dpi=150, bbox_inches='tight')
-    plt.close()
+    target_path.write_bytes(_placeholder_bytes(message))
+
+# Rendered chart bytes keyed by (chart name, ClusterArrays.digest); a dashboard
+# refresh with unchanged interpretations skips matplotlib entirely
+_PNG_CACHE: Dict[Tuple[str, str], bytes] = {}
+_PNG_CACHE_MAX = 32
+
+
+def _digest(obj) -> str:
+    payload = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _write_cached_png(path: Path | str, key: Tuple[str, str]) -> bool:
+    """Write a previously rendered chart to ``path``; False on cache miss"""
+    data = _PNG_CACHE.get(key)
+    if data is None:
+        return False
+    target_path = Path(path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    target_path.write_bytes(data)
+    return True
+
+
+# One Agg figure reused by every chart: clearing it between renders keeps the
+# canvas and font caches instead of allocating a new figure per chart. It is
+# not registered with pyplot, and _FIG_LOCK serialises renders that share it.
+_FIG = Figure()
+FigureCanvasAgg(_FIG)
+_FIG_LOCK = threading.Lock()
+
+
+@contextmanager
+def _reused_figure(figsize):
+    """Yield the shared figure, cleared and resized, holding the render lock"""
+    with _FIG_LOCK:
+        _FIG.clear()
+        _FIG.set_size_inches(*figsize)
+        try:
+            yield _FIG
+        finally:
+            _FIG.clear()
+
+
+def _save_figure(fig: Figure, path: Path | str, key: Tuple[str, str]):
+    """Render ``fig`` to memory, memoize it, then write it to ``path``"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
+    data = buf.getvalue()
+    if len(_PNG_CACHE) >= _PNG_CACHE_MAX:
+        _PNG_CACHE.clear()
+    _PNG_CACHE[key] = data
+    target_path = Path(path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    target_path.write_bytes(data)
+
+
+@dataclass
+class ClusterArrays:
+    """Column-oriented view of ``cluster_interpretations`` shared by the plotters"""
+    cluster_ids: List[str]
+    phenotypes: List[str]
+    sizes: np.ndarray
+    ages: np.ndarray
+    must: np.ndarray
+    conditions: pd.DataFrame  # long format: Cluster, Condition, Prevalence (%)
+    digest: str = ''          # content hash, used to memoize rendered charts
+
+
+@lru_cache(maxsize=1024)
+def _clean_condition_name(name: str) -> str:
+    """'RF_dry_skin' -> 'Dry Skin' (names repeat across clusters, so memoized)"""
+    return name.removeprefix('RF_').replace('_', ' ').title()
+
+
+def prepare_cluster_arrays(cluster_interpretations) -> ClusterArrays:
+    """Walk ``cluster_interpretations`` once and pack it into typed arrays"""
+    n = len(cluster_interpretations)
+    cluster_ids = []
+    phenotypes = []
+    sizes = np.empty(n)
+    ages = np.empty(n)
+    must = np.empty(n)
+    condition_rows = []
+
+    for i, (cluster_id, info) in enumerate(cluster_interpretations.items()):
+        cluster_ids.append(str(cluster_id))
+        phenotypes.append(info.get('phenotype', 'Unknown')[:30])  # Truncate long names
+        sizes[i] = info.get('size', 0)
+        ages[i] = info.get('avg_age') or 0
+        must[i] = info.get('must_score') or 0
+        for condition, prevalence in info.get('top_rf_conditions', {}).items():
+            clean_name = _clean_condition_name(condition)
+            condition_rows.append((f"Cluster {cluster_id}", clean_name, prevalence * 100))  # Convert to percentage
 
-def show_cluster_heatmap(cluster_interpretations):
+    conditions = pd.DataFrame(condition_rows, columns=['Cluster', 'Condition', 'Prevalence'])
+    digest = _digest([cluster_ids, phenotypes, sizes.tolist(), ages.tolist(),
+                      must.tolist(), condition_rows])
+    return ClusterArrays(cluster_ids, phenotypes, sizes, ages, must, conditions, digest)
+
+
+def _as_cluster_arrays(cluster_data) -> ClusterArrays:
+    if isinstance(cluster_data, ClusterArrays):
+        return cluster_data
+    return prepare_cluster_arrays(cluster_data)
+
+
+def show_cluster_heatmap(cluster_data):
     """Create and show the RF conditions heatmap"""
     
-    # Prepare data
-    condition_data = []
-    
-    for cluster_id, info in cluster_interpretations.items():
-        top_conditions = info.get('top_rf_conditions', {})
-        for condition, prevalence in top_conditions.items():
-            clean_name = condition.replace('RF_', '').replace('_', ' ').title()
-            condition_data.append({
-                'Cluster': f"Cluster {cluster_id}",
-                'Condition': clean_name,
-                'Prevalence': prevalence * 100  # Convert to percentage
-            })
+    arrays = _as_cluster_arrays(cluster_data)
+    condition_df = arrays.conditions
+    key = ('heatmap', arrays.digest)
+    if _write_cached_png(HEATMAP_PATH, key):
+        return
     
-    if not condition_data:
+    if condition_df.empty:
         print("No condition data found for visualization; writing placeholder")
         _write_placeholder_png(HEATMAP_PATH, 'No RF condition data to display')
         return
     
-    condition_df = pd.DataFrame(condition_data)
+    # Build the condition x cluster grid with a direct scatter instead of
+    # DataFrame.pivot; cells a cluster does not report stay NaN (blank)
+    cond_codes, cond_labels = pd.factorize(condition_df['Condition'], sort=True)
+    clu_codes, clu_labels = pd.factorize(condition_df['Cluster'], sort=True)
+    grid = np.full((len(cond_labels), len(clu_labels)), np.nan)
+    grid[cond_codes, clu_codes] = condition_df['Prevalence'].to_numpy()
+    heatmap_data = pd.DataFrame(grid, index=pd.Index(cond_labels, name='Condition'),
+                                columns=pd.Index(clu_labels, name='Cluster'))
     
-    # Create pivot table for heatmap
-    heatmap_data = condition_df.pivot(index='Condition', columns='Cluster', values='Prevalence')
+    # Per-cell labels dominate render time on big grids; colorbar only there
+    annot = grid.size <= _HEATMAP_ANNOT_MAX_CELLS
     
     # Create the heatmap
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(heatmap_data, annot=True, fmt='.1f', cmap='Reds', 
-                cbar_kws={'label': 'Prevalence (%)'})
-    
-    plt.title('RF Conditions Prevalence Across Clusters\n(>10% prevalence)', 
-              fontsize=16, fontweight='bold', pad=20)
-    plt.xlabel('Patient Clusters', fontsize=12)
-    plt.ylabel('Medical Conditions', fontsize=12)
-    
-    # Rotate labels for better readability
-    plt.xticks(rotation=0)
-    plt.yticks(rotation=0)
-    
-    plt.tight_layout()
-    Path(HEATMAP_PATH).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(str(HEATMAP_PATH), dpi=300, bbox_inches='tight')
-    plt.close()
+    with _reused_figure((12, 10)) as fig:
+        ax = fig.add_subplot(111)
+        sns.heatmap(heatmap_data, annot=annot, fmt='.1f', cmap='Reds', 
+                    cbar_kws={'label': 'Prevalence (%)'}, ax=ax)
+        
+        ax.set_title('RF Conditions Prevalence Across Clusters\n(>10% prevalence)', 
+                     fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlabel('Patient Clusters', fontsize=12)
+        ax.set_ylabel('Medical Conditions', fontsize=12)
+        
+        # Rotate labels for better readability
+        ax.tick_params(axis='x', labelrotation=0)
+        ax.tick_params(axis='y', labelrotation=0)
+        
+        fig.tight_layout()
+        _save_figure(fig, HEATMAP_PATH, key)
     
     print(f"Heatmap saved as: {HEATMAP_PATH}")
 
-def show_cluster_sizes(cluster_interpretations):
+def show_cluster_sizes(cluster_data):
     """Create and show cluster size distribution"""
     
-    cluster_ids = []
-    sizes = []
-    phenotypes = []
-    
-    for cluster_id, info in cluster_interpretations.items():
-        cluster_ids.append(f"Cluster {cluster_id}")
-        sizes.append(info.get('size', 0))
-        phenotypes.append(info.get('phenotype', 'Unknown')[:30])  # Truncate long names
+    arrays = _as_cluster_arrays(cluster_data)
+    cluster_ids = [f"Cluster {cid}" for cid in arrays.cluster_ids]
+    sizes = arrays.sizes
+    phenotypes = arrays.phenotypes
+    key = ('sizes', arrays.digest)
+    if _write_cached_png(SIZES_PATH, key):
+        return
     
-    if len(cluster_ids) == 0 or sum(sizes) <= 0:
+    if len(cluster_ids) == 0 or sizes.sum() <= 0:
         print("No cluster size data; writing placeholder")
         _write_placeholder_png(SIZES_PATH, 'No cluster size data to display')
         return
 
     # Create pie chart
-    plt.figure(figsize=(10, 8))
     colors = plt.cm.Set3(np.linspace(0, 1, len(cluster_ids)))
-    
-    wedges, texts, autotexts = plt.pie(sizes, labels=cluster_ids, autopct='%1.1f%%', 
-                                       colors=colors, startangle=90)
-    
-    plt.title('Patient Cluster Size Distribution', fontsize=16, fontweight='bold')
-    
-    # Add legend with phenotypes
-    legend_labels = [f"{cluster_ids[i]}: {phenotypes[i]}" for i in range(len(cluster_ids))]
-    plt.legend(legend_labels, loc='center left', bbox_to_anchor=(1, 0.5))
-    
-    plt.tight_layout()
-    Path(SIZES_PATH).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(str(SIZES_PATH), dpi=300, bbox_inches='tight')
-    plt.close()
+    with _reused_figure((10, 8)) as fig:
+        ax = fig.add_subplot(111)
+        wedges, texts, autotexts = ax.pie(sizes, labels=cluster_ids, autopct='%1.1f%%', 
+                                          colors=colors, startangle=90)
+        
+        ax.set_title('Patient Cluster Size Distribution', fontsize=16, fontweight='bold')
+        
+        # Add legend with phenotypes
+        legend_labels = [f"{cluster_ids[i]}: {phenotypes[i]}" for i in range(len(cluster_ids))]
+        ax.legend(legend_labels, loc='center left', bbox_to_anchor=(1, 0.5))
+        
+        fig.tight_layout()
+        _save_figure(fig, SIZES_PATH, key)
     
     print(f"Cluster sizes chart saved as: {SIZES_PATH}")
 
-def show_demographics(cluster_interpretations):
+def show_demographics(cluster_data):
     """Show demographics comparison"""
     
-    cluster_ids = []
-    ages = []
-    must_scores = []
-    
-    for cluster_id, info in cluster_interpretations.items():
-        cluster_ids.append(f"C{cluster_id}")
-        ages.append(info.get('avg_age', 0) if info.get('avg_age') else 0)
-        must_scores.append(info.get('must_score', 0) if info.get('must_score') else 0)
+    arrays = _as_cluster_arrays(cluster_data)
+    cluster_ids = [f"C{cid}" for cid in arrays.cluster_ids]
+    ages = arrays.ages
+    must_scores = arrays.must
+    key = ('demographics', arrays.digest)
+    if _write_cached_png(DEMOS_PATH, key):
+        return
     
-    if len(cluster_ids) == 0:
+    # Nothing to plot on either axis (e.g. fresh deploy): skip both bar charts
+    if len(cluster_ids) == 0 or (not ages.any() and not must_scores.any()):
         print("No demographics data; writing placeholder")
         _write_placeholder_png(DEMOS_PATH, 'No demographics data to display')
         return
 
-    # Create subplots
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    colors = plt.cm.Set3(np.linspace(0, 1, len(cluster_ids)))
+    with _reused_figure((15, 6)) as fig:
+        ax1, ax2 = fig.subplots(1, 2)
     
-    # Age comparison
-    bars1 = ax1.bar(cluster_ids, ages, color=plt.cm.Set3(np.linspace(0, 1, len(cluster_ids))))
-    ax1.set_title('Average Age by Cluster', fontweight='bold')
-    ax1.set_ylabel('Age (years)')
-    ax1.set_xlabel('Cluster')
+        # Age comparison
+        bars1 = ax1.bar(cluster_ids, ages, color=colors)
+        ax1.set_title('Average Age by Cluster', fontweight='bold')
+        ax1.set_ylabel('Age (years)')
+        ax1.set_xlabel('Cluster')
     
-    # Add value labels
-    for bar, age in zip(bars1, ages):
-        if age > 0:
-            ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5,
-                    f'{age:.1f}', ha='center', va='bottom', fontweight='bold')
+        # Add value labels
+        for bar, age in zip(bars1, ages):
+            if age > 0:
+                ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5,
+                        f'{age:.1f}', ha='center', va='bottom', fontweight='bold')
     
-    # MUST score comparison
-    bars2 = ax2.bar(cluster_ids, must_scores, color=plt.cm.Set3(np.linspace(0, 1, len(cluster_ids))))
-    ax2.set_title('MUST Score by Cluster', fontweight='bold')
-    ax2.set_ylabel('MUST Score')
-    ax2.set_xlabel('Cluster')
+        # MUST score comparison
+        bars2 = ax2.bar(cluster_ids, must_scores, color=colors)
+        ax2.set_title('MUST Score by Cluster', fontweight='bold')
+        ax2.set_ylabel('MUST Score')
+        ax2.set_xlabel('Cluster')
     
-    # Add risk zones
-    ax2.axhline(y=2, color='red', linestyle='--', alpha=0.7, label='High Risk (≥2)')
-    ax2.axhline(y=1, color='orange', linestyle='--', alpha=0.7, label='Medium Risk (1-2)')
+        # Add risk zones
+        ax2.axhline(y=2, color='red', linestyle='--', alpha=0.7, label='High Risk (≥2)')
+        ax2.axhline(y=1, color='orange', linestyle='--', alpha=0.7, label='Medium Risk (1-2)')
     
-    # Add value labels
-    for bar, score in zip(bars2, must_scores):
-        if score > 0:
-            ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.05,
-                    f'{score:.2f}', ha='center', va='bottom', fontweight='bold')
+        # Add value labels
+        for bar, score in zip(bars2, must_scores):
+            if score > 0:
+                ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.05,
+                        f'{score:.2f}', ha='center', va='bottom', fontweight='bold')
     
-    ax2.legend()
+        ax2.legend()
     
-    plt.tight_layout()
-    Path(DEMOS_PATH).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(str(DEMOS_PATH), dpi=300, bbox_inches='tight')
-    plt.close()
+        fig.tight_layout()
+        _save_figure(fig, DEMOS_PATH, key)
     
     print(f"Demographics chart saved as: {DEMOS_PATH}")
 
+# Chart name -> renderer; names match the PNG cache keys used above
+_RENDERERS = {
+    'heatmap': show_cluster_heatmap,
+    'sizes': show_cluster_sizes,
+    'demographics': show_demographics,
+}
+
+# Worker processes import matplotlib/seaborn once, so the pool is kept
+# around between requests instead of being rebuilt each time
+_RENDER_POOL = None
+_RENDER_POOL_LOCK = threading.Lock()
+
+
+def _render_pool() -> ProcessPoolExecutor:
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _RENDER_POOL is None:
+            # forkserver avoids forking the threaded server process (Linux/macOS);
+            # Windows only has spawn, which is the default there anyway
+            ctx = None
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context('forkserver')
+            _RENDER_POOL = ProcessPoolExecutor(max_workers=len(_RENDERERS), mp_context=ctx)
+        return _RENDER_POOL
+
+
+def _render_one(job):
+    """Worker entry point: render one chart and hand its PNG bytes back"""
+    name, arrays = job
+    _RENDERERS[name](arrays)
+    return name, _PNG_CACHE.get((name, arrays.digest))
+
+
+def render_all_charts(cluster_data):
+    """Render heatmap, sizes and demographics charts in parallel processes.
+
+    Each worker writes its own PNG; the returned bytes are also stored in this
+    process' cache so later single-chart requests are served from memory.
+    Falls back to rendering in-process if the pool cannot be used.
+    """
+    global _RENDER_POOL
+    arrays = _as_cluster_arrays(cluster_data)
+    jobs = [(name, arrays) for name in _RENDERERS]
+    try:
+        results = list(_render_pool().map(_render_one, jobs))
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Parallel chart rendering unavailable ({e}); rendering in-process")
+        with _RENDER_POOL_LOCK:
+            _RENDER_POOL = None
+        results = [_render_one(job) for job in jobs]
+    for name, data in results:
+        if data is not None:
+            if len(_PNG_CACHE) >= _PNG_CACHE_MAX:
+                _PNG_CACHE.clear()
+            _PNG_CACHE[(name, arrays.digest)] = data
+
 # Optional CLI usage retained (requires user to pass interpretations manually)
 if __name__ == "__main__":
     print("This module provides plotting functions for the API.\n"
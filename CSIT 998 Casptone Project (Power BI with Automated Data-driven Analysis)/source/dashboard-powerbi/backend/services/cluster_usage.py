@@ -1,24 +1,117 @@
 import pandas as pd
 import numpy as np
+import hashlib
+import json
+import logging
 import pickle
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from sklearn.metrics.pairwise import euclidean_distances
+from typing import Any, Dict, List
+from services.model_usage import SVDProjection
 
 # Fixed model loader for patient clustering
 # ========================================
 
+logger = logging.getLogger(__name__)
+
 # Get ML models directory
 ML_MODELS_DIR = Path(__file__).parent.parent / "ml" / "models"
 
-class PatientClusteringPipeline:
-    """Dummy class to handle pickle loading"""
-    def __init__(self, svd_model=None, clustering_model=None, rf_columns=None):
-        self.svd_model = svd_model
-        self.clustering_model = clustering_model
-        self.rf_columns = rf_columns
+# The only globals a clustering model pickle may reference. Anything else
+# (os.system, builtins.eval, ...) is refused instead of imported and called
+_PICKLE_ALLOWED = frozenset({
+    ('numpy', 'dtype'),
+    ('numpy', 'ndarray'),
+    ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy._core.multiarray', 'scalar'),
+    ('numpy.core.multiarray', '_reconstruct'),  # pickles written by numpy < 2
+    ('numpy.core.multiarray', 'scalar'),
+    ('sklearn.cluster._kmeans', 'KMeans'),
+    ('sklearn.decomposition._truncated_svd', 'TruncatedSVD'),
+    ('sklearn.mixture._gaussian_mixture', 'GaussianMixture'),
+})
+
+class RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler that only resolves the allowlisted model classes"""
+    def find_class(self, module, name):
+        if (module, name) in _PICKLE_ALLOWED:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from model pickle")
+
+class NearestCenterModel:
+    """KMeans reduced to its centers: predict() assigns the closest center"""
+    def __init__(self, cluster_centers):
+        self.cluster_centers_ = _as_float32(cluster_centers)
     
-    def predict(self, new_patient_data):
-        pass  # We won't use this, just need it to exist for pickle
+    def predict(self, X):
+        return _assign_clusters(np.asarray(X, dtype=np.float32), self)[0]
+
+def _as_float32(array):
+    """C-contiguous float32 copy (or the array itself if it already is one)"""
+    return np.ascontiguousarray(array, dtype=np.float32)
+
+def _plain(obj):
+    """numpy scalars/keys -> built-in types so the value can be written as JSON"""
+    if isinstance(obj, dict):
+        return {str(_plain(k)): _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+def _int_keys(pairs):
+    """JSON object hook restoring integer keys (cluster ids, gender codes)"""
+    return {int(k) if k.lstrip('-').isdigit() else k: v for k, v in pairs}
+
+def _array_paths(model_path):
+    return model_path.with_suffix('.npz'), model_path.with_suffix('.json')
+
+def _file_digest(path):
+    """SHA-256 of a file; ties exported arrays to the exact pickle they came from"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_array_models(model_path, svd_model, clustering_model, rf_columns, cluster_interpretations):
+    arrays_path, meta_path = _array_paths(model_path)
+    np.savez(arrays_path,
+             svd_components=svd_model.components_,
+             svd_explained_variance_ratio=svd_model.explained_variance_ratio_,
+             cluster_centers=clustering_model.cluster_centers_)
+    meta_path.write_text(json.dumps({
+        'source_sha256': _file_digest(model_path),
+        'rf_columns': _plain(rf_columns),
+        'cluster_interpretations': _plain(cluster_interpretations),
+    }, indent=2), encoding='utf-8')
+    return arrays_path, meta_path
+
+def export_patient_models(filename='patient_classifier_model.pkl'):
+    """
+    Write the pickled clustering model out as arrays (.npz) plus JSON metadata,
+    which load_patient_models then reads without unpickling anything
+    """
+    model_path = ML_MODELS_DIR / filename
+    svd_model, clustering_model, rf_columns, cluster_interpretations = _load_pickled_models(model_path)
+    if svd_model is None or clustering_model is None:
+        raise ValueError(f"Could not load {filename} for export")
+    arrays_path, meta_path = _write_array_models(model_path, svd_model, clustering_model,
+                                                 rf_columns, cluster_interpretations)
+    print(f"Exported {arrays_path.name} and {meta_path.name}")
+
+def _load_array_models(arrays_path, meta_path, source_digest=None):
+    """Read the exported models; None when they were not exported from source_digest"""
+    meta = json.loads(meta_path.read_text(encoding='utf-8'), object_pairs_hook=_int_keys)
+    if source_digest is not None and meta.get('source_sha256') != source_digest:
+        return None
+    with np.load(arrays_path, allow_pickle=False) as arrays:
+        svd_model = SVDProjection(arrays['svd_components'], arrays['svd_explained_variance_ratio'])
+        clustering_model = NearestCenterModel(arrays['cluster_centers'])
+    return svd_model, clustering_model, meta['rf_columns'], meta['cluster_interpretations']
 
 def load_patient_models(filename='patient_classifier_model.pkl'):
     """
@@ -26,14 +119,39 @@ def load_patient_models(filename='patient_classifier_model.pkl'):
     """
     # Use full path to ML models directory
     model_path = ML_MODELS_DIR / filename
-    print(f"Loading models from: {model_path}")
+    arrays_path, meta_path = _array_paths(model_path)
+    
+    # Prefer the exported arrays + JSON: no pickle, so no code runs on load.
+    # They are only trusted while they match the pickle they were exported
+    # from; a retrained pickle wins and is re-exported
+    if arrays_path.exists() and meta_path.exists():
+        try:
+            source_digest = _file_digest(model_path) if model_path.exists() else None
+            models = _load_array_models(arrays_path, meta_path, source_digest)
+            if models is not None:
+                _log_components(arrays_path, *models)
+                return models
+            logger.warning(f"{arrays_path.name} is stale for {model_path.name}; reloading the pickle")
+        except Exception as e:
+            logger.warning(f"Loading exported models failed ({e}); falling back to {model_path.name}")
     
+    models = _load_pickled_models(model_path)
+    if models[0] is not None and models[1] is not None:
+        try:
+            _write_array_models(model_path, *models)
+        except Exception as e:
+            logger.warning(f"Could not re-export {model_path.name} ({e})")
+    return models
+
+def _log_components(model_path, svd_model, clustering_model, rf_columns, cluster_interpretations):
+    logger.info(f"Loaded models from {model_path}: SVD model {type(svd_model).__name__}, "
+                f"clustering model {type(clustering_model).__name__}, "
+                f"{len(rf_columns)} RF columns, {len(cluster_interpretations)} clusters")
+
+def _load_pickled_models(model_path):
     try:
-        # Now pickle can find the PatientClusteringPipeline class
         with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
-        
-        print("Models loaded successfully")
+            model_data = RestrictedUnpickler(f).load()
         
         # Extract the components we actually need
         svd_model = model_data.get('svd_model')
@@ -46,58 +164,111 @@ def load_patient_models(filename='patient_classifier_model.pkl'):
         rf_columns = model_data.get('rf_columns', [])
         cluster_interpretations = model_data.get('cluster_interpretations', {})
         
-        print("Extracted components:")
-        print(f"  SVD model: {type(svd_model).__name__}")
-        print(f"  Clustering model: {type(clustering_model).__name__}")
-        print(f"  RF columns: {len(rf_columns)}")
-        print(f"  Clusters: {len(cluster_interpretations)}")
+        # Normalize the SVD basis once so every transform takes BLAS's fast path
+        # without per-call dtype/contiguity copies. KMeans centers are left
+        # alone (its Cython predict needs float64); _center_norms keeps a
+        # float32 copy per model for the distance math
+        if hasattr(svd_model, 'components_'):
+            svd_model.components_ = _as_float32(svd_model.components_)
+        
+        _log_components(model_path, svd_model, clustering_model, rf_columns, cluster_interpretations)
         
         return svd_model, clustering_model, rf_columns, cluster_interpretations
         
     except Exception as e:
-        print(f"Loading failed: {e}")
+        logger.error(f"Loading failed: {e}")
         return None, None, None, None
 
+@lru_cache(maxsize=4)
+def _center_norms(clustering_model):
+    """Cluster centers and their squared norms, computed once per loaded model"""
+    centers = _as_float32(clustering_model.cluster_centers_)
+    return centers, np.einsum('ij,ij->i', centers, centers)
+
+def _assign_clusters(svd_features, clustering_model):
+    """
+    Predicted cluster and confidence for each row
+    
+    Centroid models (K-means) get both from one distance pass: the nearest
+    center is the prediction and the runner-up gives
+    confidence = 1 - d_assigned / (d_assigned + d_nearest_other).
+    Other models fall back to predict() with no confidence.
+    """
+    if not hasattr(clustering_model, 'cluster_centers_'):
+        return clustering_model.predict(svd_features), [None] * len(svd_features)
+    
+    # Squared distances via ||c||^2 - 2 c.x + ||x||^2; only the assigned
+    # and nearest other cluster need the sqrt
+    centers, centers_sqnorm = _center_norms(clustering_model)
+    sq_distances = (centers_sqnorm - 2.0 * (svd_features @ centers.T)
+                    + np.einsum('ij,ij->i', svd_features, svd_features)[:, None])
+    np.maximum(sq_distances, 0.0, out=sq_distances)
+    
+    if sq_distances.shape[1] > 1:
+        # kth=1 puts the nearest center in column 0 and the runner-up in column 1
+        nearest_two = np.argpartition(sq_distances, 1, axis=1)[:, :2]
+        best_two = np.sqrt(np.take_along_axis(sq_distances, nearest_two, axis=1))
+        predicted_clusters = nearest_two[:, 0]
+        assigned_distance, min_other = best_two[:, 0], best_two[:, 1]
+    else:
+        predicted_clusters = np.zeros(len(sq_distances), dtype=np.intp)
+        assigned_distance = min_other = np.sqrt(sq_distances[:, 0])
+    return predicted_clusters, 1 - (assigned_distance / (assigned_distance + min_other))
+
+# (rf_columns list, column -> position); rebuilt when the models are reloaded
+_rf_index_cache = (None, {})
+
+def _rf_column_index(rf_columns):
+    global _rf_index_cache
+    cached_columns, rf_index = _rf_index_cache
+    if cached_columns is not rf_columns:
+        rf_index = {col: i for i, col in enumerate(rf_columns)}
+        _rf_index_cache = (rf_columns, rf_index)
+    return rf_index
+
 def classify_patient(patient_data, svd_model, clustering_model, rf_columns, cluster_interpretations, patient_id="Unknown"):
     """
     Classify a new patient using the loaded models
     """
-    print(f"\nClassifying patient: {patient_id}")
+    logger.debug("Classifying patient: %s", patient_id)
     
     # Prepare patient data
     if isinstance(patient_data, dict):
-        patient_df = pd.DataFrame([patient_data])
+        # Scatter the given RF values straight into a zero vector; unknown keys
+        # are ignored and missing/NaN values count as 0
+        rf_index = _rf_column_index(rf_columns)
+        rf_features = np.zeros((1, len(rf_columns)), dtype=np.float32)
+        active_total = 0.0  # running sum of the scattered values, saves a reduction
+        for col, value in patient_data.items():
+            i = rf_index.get(col)
+            if i is not None and value is not None and value == value:
+                rf_features[0, i] = value
+                active_total += float(value)
     else:
         patient_df = patient_data.copy()
-    
-    # Add missing RF columns as 0
-    for col in rf_columns:
-        if col not in patient_df.columns:
-            patient_df[col] = 0
-    
-    # Extract RF features
-    rf_features = patient_df[rf_columns].fillna(0).values
+        
+        # Add missing RF columns as 0
+        for col in rf_columns:
+            if col not in patient_df.columns:
+                patient_df[col] = 0
+        
+        # Extract RF features
+        rf_features = patient_df[rf_columns].fillna(0).values
+        active_total = rf_features.sum()
     
     # Apply SVD transformation
     svd_features = svd_model.transform(rf_features)
     
-    # Predict cluster
-    predicted_cluster = clustering_model.predict(svd_features)[0]
-    
-    # Calculate confidence (if K-means)
-    confidence = None
-    if hasattr(clustering_model, 'cluster_centers_'):
-        distances = euclidean_distances(svd_features, clustering_model.cluster_centers_)[0]
-        assigned_distance = distances[predicted_cluster]
-        other_distances = [d for i, d in enumerate(distances) if i != predicted_cluster]
-        min_other = min(other_distances) if other_distances else assigned_distance
-        confidence = 1 - (assigned_distance / (assigned_distance + min_other))
+    # Predict cluster, with confidence (if K-means)
+    predicted_clusters, confidences = _assign_clusters(svd_features[:1], clustering_model)
+    predicted_cluster = predicted_clusters[0]
+    confidence = confidences[0]
     
     # Get cluster info
     cluster_info = cluster_interpretations.get(predicted_cluster, {})
     
     # Count active conditions
-    active_conditions = int(rf_features.sum())
+    active_conditions = int(active_total)
     
     result = {
         'patient_id': patient_id,
@@ -108,14 +279,76 @@ def classify_patient(patient_data, svd_model, clustering_model, rf_columns, clus
         'cluster_size': cluster_info.get('size', 'Unknown')
     }
     
-    print(f"Result: Cluster {predicted_cluster} - {result['cluster_phenotype']}")
-    if confidence:
-        print(f"Confidence: {confidence:.3f}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Result: Cluster %s - %s (confidence %s)", predicted_cluster,
+                     result['cluster_phenotype'], f"{confidence:.3f}" if confidence else "n/a")
     
     return result
 
+def classify_patients_batch(patients, svd_model, clustering_model, rf_columns, cluster_interpretations, patient_ids=None):
+    """
+    Classify many patients with one SVD transform and one predict call
+    
+    ``patients`` is a list of RF feature dicts or a DataFrame (one row per
+    patient). Returns one result dict per patient, as classify_patient does.
+    """
+    patient_df = patients if isinstance(patients, pd.DataFrame) else pd.DataFrame(list(patients))
+    if patient_ids is None:
+        patient_ids = [f"Patient_{i + 1}" for i in range(len(patient_df))]
+    logger.debug("Classifying %d patients", len(patient_df))
+    if len(patient_df) == 0:
+        return []
+    
+    # Missing RF columns count as 0, as in classify_patient
+    rf_features = patient_df.reindex(columns=rf_columns, fill_value=0).fillna(0).values
+    svd_features = svd_model.transform(rf_features)
+    predicted_clusters, confidences = _assign_clusters(svd_features, clustering_model)
+    active_conditions = rf_features.sum(axis=1)
+    
+    results = []
+    for i, predicted_cluster in enumerate(predicted_clusters):
+        cluster_info = cluster_interpretations.get(predicted_cluster, {})
+        results.append({
+            'patient_id': patient_ids[i],
+            'predicted_cluster': predicted_cluster,
+            'cluster_phenotype': cluster_info.get('phenotype', 'Unknown'),
+            'confidence_score': confidences[i],
+            'active_conditions_count': int(active_conditions[i]),
+            'cluster_size': cluster_info.get('size', 'Unknown')
+        })
+    return results
+
+@dataclass(frozen=True, slots=True)
+class ClusterModels:
+    """Loaded clustering components, shared read-only across requests"""
+    svd_model: Any
+    clustering_model: Any
+    rf_columns: List[str]
+    cluster_interpretations: Dict[int, Dict[str, Any]]
+
+_models_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _cached_cluster_models(filename):
+    svd, clu, rfs, interp = load_patient_models(filename)
+    if svd is None or clu is None or not rfs:
+        # Raising keeps the failure out of the cache, so the next call retries
+        raise RuntimeError("Models not loaded. Check pickle path/format.")
+    return ClusterModels(svd, clu, rfs, interp or {})
+
+def get_cluster_models(filename='patient_classifier_model.pkl') -> ClusterModels:
+    """Load the clustering models once per process; concurrent first calls wait for one load"""
+    with _models_lock:
+        return _cached_cluster_models(filename)
+
 # Globals populated lazily by shared.ensure_models_loaded
 svd_model = None
 clustering_model = None
 rf_columns = []
-cluster_interpretations = {}
\ No newline at end of file
+cluster_interpretations = {}
+_loaded = False  # set once the globals above hold a complete model set
+
+# Regenerate the pickle-free model files after retraining:
+#   python -m services.cluster_usage
+if __name__ == "__main__":
+    export_patient_models()
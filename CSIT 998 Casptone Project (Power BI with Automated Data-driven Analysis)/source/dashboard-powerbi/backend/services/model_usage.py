@@ -1,34 +1,103 @@
 import pandas as pd
 import numpy as np
 import joblib
+import copy
 import json
+import logging
+import threading
+from functools import lru_cache
 from pathlib import Path
 from sklearn.decomposition import TruncatedSVD
 from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 # Get ML models and data directories
 ML_MODELS_DIR = Path(__file__).parent.parent / "ml" / "models"
 DATA_SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
 
-def safe_print(*args, **kwargs):
-    try:
-        print(*args, **kwargs)
-    except UnicodeEncodeError:
-        new_args = []
-        for a in args:
-            if isinstance(a, str):
-                try:
-                    new_args.append(a.encode('ascii', 'ignore').decode('ascii'))
-                except Exception:
-                    new_args.append('')
-            else:
-                new_args.append(a)
+# Risk bands checked from the top down: (minimum probability, assessment).
+# Built once and shared by every prediction, so treat them as read-only.
+# Recommendations start with an ASCII [TAG]; the frontend maps tags to icons.
+_RISK_LEVELS = (
+    (0.80, {
+        'level': "VERY HIGH",
+        'category': "Immediate Intervention Required",
+        'recommendations': (
+            "[URGENT] Complete comprehensive nutritional assessment within 24 hours",
+            "[DIET] Schedule immediate dietitian consultation",
+            "[MONITOR] Initiate daily weight monitoring",
+            "[SUPPLEMENT] Consider nutritional supplements",
+            "[TEAM] Coordinate multidisciplinary care team"
+        ),
+    }),
+    (0.60, {
+        'level': "HIGH",
+        'category': "Enhanced Monitoring Required",
+        'recommendations': (
+            "[ALERT] Complete MUST assessment within 48 hours",
+            "[DIET] Schedule dietitian consultation within 1 week",
+            "[MONITOR] Implement bi-weekly weight monitoring",
+            "[INTAKE] Review dietary intake patterns"
+        ),
+    }),
+    (0.40, {
+        'level': "MODERATE",
+        'category': "Routine Enhanced Screening",
+        'recommendations': (
+            "[ASSESS] Complete standard MUST assessment",
+            "[INTAKE] Review dietary preferences and intake",
+            "[MONITOR] Monthly weight monitoring",
+            "[AWARENESS] Staff awareness of nutritional concerns"
+        ),
+    }),
+    (float('-inf'), {
+        'level': "LOW",
+        'category': "Standard Care",
+        'recommendations': (
+            "[ROUTINE] Continue routine nutritional care",
+            "[MONITOR] Quarterly weight checks",
+            "[SCHEDULE] Routine MUST screening per protocol"
+        ),
+    }),
+)
+
+# Distinct (age, gender, conditions, include_details) inputs remembered per loaded model
+PREDICTION_CACHE_SIZE = 1024
+
+def _conditions_key(patient_conditions):
+    """Hashable, order-independent form of patient_conditions (None if not cacheable)"""
+    if isinstance(patient_conditions, dict):
         try:
-            print(*new_args, **kwargs)
-        except Exception:
-            pass
+            return ('dict', tuple(sorted(patient_conditions.items())))
+        except TypeError:
+            return None
+    if isinstance(patient_conditions, list):
+        return ('list', tuple(patient_conditions))
+    return None
+
+class SVDProjection:
+    """Fitted TruncatedSVD reduced to what prediction needs: X @ components_.T"""
+
+    def __init__(self, components, explained_variance_ratio):
+        # float32 halves the bytes moved per matmul; precision is ample for 0/1 RF inputs
+        self.components_ = np.ascontiguousarray(components, dtype=np.float32)
+        self._components_T = np.ascontiguousarray(self.components_.T)  # (n_rf, n_components)
+        self.explained_variance_ratio_ = explained_variance_ratio
+        self.n_components = components.shape[0]
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float32) @ self._components_T
+
+def _svd_cache_path(model_path):
+    return model_path.with_name(f"{model_path.stem}_svd.npz")
+
+def _svd_source_key(data_path, n_components):
+    """Identify the data the SVD was fitted on; a changed CSV invalidates the cache"""
+    stat = data_path.stat()
+    return np.array([stat.st_size, stat.st_mtime_ns, n_components], dtype=np.int64)
 
 class SVDNutritionalRiskPredictor:
 
@@ -40,71 +109,164 @@ class SVDNutritionalRiskPredictor:
         self.scaler = None
         self.model = None
         self.requires_scaling = False
+        self._rf_index = {}          # RF column -> position in rf_vector
+        self._rf_names = []          # 'RF_dry_skin' -> 'dry skin', for list matching
+        self._condition_index = {}   # lowercased condition -> matched position (or None)
+        self._age_idx = None         # positions of the features in feature_columns
+        self._gender_idx = None
+        self._svd_feat_idx = np.empty(0, dtype=np.intp)
+        self._svd_comp_idx = np.empty(0, dtype=np.intp)  # matching 0-based SVD component
+        self._svd_slices = None      # (feature slice, component slice) when both are contiguous runs
+        self._cached_prediction = None  # LRU over _predict_from_key, rebuilt on every model load
+        self._scratch_local = threading.local()  # per-thread (rf, svd, feature) row buffers
         
     def load_trained_components(self, model_filename="patient_predictor_model.pkl", clustering_data_path="UpdatedDataFile_aggregated.csv"):
         # Use full paths
         model_path = ML_MODELS_DIR / model_filename
         data_path = DATA_SAMPLES_DIR / clustering_data_path
         
-        safe_print("\n1. LOADING TRAINED MODEL AND SVD COMPONENTS")
-        safe_print("-" * 50)
-        
         try:
-            # Load the trained model package
-            self.model_package = joblib.load(model_path)
+            # Load the trained model package; numpy arrays (support vectors etc.)
+            # are memory-mapped copy-on-write instead of read into the process.
+            # Not 'r': libsvm's predict rejects read-only buffers
+            self.model_package = joblib.load(model_path, mmap_mode='c')
             self.model = self.model_package['model_object']
             self.requires_scaling = self.model_package['requires_scaling']
             self.feature_columns = self.model_package['feature_names']
+            self._build_feature_lookups()
+            # Results of the previous model must not be served for this one
+            self._cached_prediction = lru_cache(maxsize=PREDICTION_CACHE_SIZE)(self._predict_from_key)
             
             if self.requires_scaling:
                 self.scaler = self.model_package['scaler']
-                safe_print("Loaded trained model with scaling")
-            else:
-                safe_print("Loaded trained model (no scaling required)")
                 
-            safe_print(f"   Model Type: {self.model_package['model_type']}")
-            safe_print(f"   Performance: F1={self.model_package['performance_metrics']['high_risk_f1']:.3f}")
-            safe_print(f"   Features: {len(self.feature_columns)} total")
+            logger.info(f"Loaded trained model {self.model_package['model_type']} "
+                        f"({'with' if self.requires_scaling else 'no'} scaling, "
+                        f"F1={self.model_package['performance_metrics']['high_risk_f1']:.3f}, "
+                        f"{len(self.feature_columns)} features)")
             
         except FileNotFoundError:
-            safe_print(f"Model file not found: {model_filename}")
+            logger.error(f"Model file not found: {model_filename}")
             return False
         except Exception as e:
-            safe_print(f"Error loading model: {e}")
+            logger.error(f"Error loading model: {e}")
             return False
         
+        # Use the same number of components as in the saved feature columns
+        svd_component_cols = [col for col in self.feature_columns if col.startswith('SVD_Component')]
+        n_components = len(svd_component_cols)
+        
+        # Reuse SVD components persisted by an earlier start when the source data is unchanged
+        cache_path = _svd_cache_path(model_path)
+        try:
+            source_key = _svd_source_key(data_path, n_components)
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if np.array_equal(cached['source_key'], source_key):
+                    self.rf_columns = cached['rf_columns'].tolist()
+                    self._build_rf_lookups()
+                    self.svd_transformer = SVDProjection(cached['components'],
+                                                         cached['explained_variance_ratio'])
+                    logger.info(f"Loaded saved SVD components {cache_path.name} "
+                                f"({len(self.rf_columns)} RF columns, variance explained "
+                                f"{self.svd_transformer.explained_variance_ratio_.sum():.3f})")
+                    return True
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable SVD cache {cache_path.name}: {e}")
+        
         # Load the original clustering data to reconstruct SVD transformer
         try:
             df_original = pd.read_csv(data_path)
-            safe_print(f"Loaded original clustering data: {df_original.shape}")
             
             # Get RF columns
             self.rf_columns = [col for col in df_original.columns if col.startswith('RF_')]
-            safe_print(f"   RF columns: {len(self.rf_columns)}")
+            self._build_rf_lookups()
             
             # Reconstruct the SVD transformer
             rf_matrix = df_original[self.rf_columns].fillna(0).values
             
-            # Use the same number of components as in the saved feature columns
-            svd_component_cols = [col for col in self.feature_columns if col.startswith('SVD_Component')]
-            n_components = len(svd_component_cols)
-            
             # Fit SVD transformer on original data
-            self.svd_transformer = TruncatedSVD(n_components=n_components, random_state=42)
-            self.svd_transformer.fit(rf_matrix)
+            svd = TruncatedSVD(n_components=n_components, random_state=42)
+            svd.fit(rf_matrix)
+            self.svd_transformer = SVDProjection(svd.components_, svd.explained_variance_ratio_)
             
-            safe_print(f"Reconstructed SVD transformer with {n_components} components")
-            safe_print(f"   Variance explained: {self.svd_transformer.explained_variance_ratio_.sum():.3f}")
+            logger.info(f"Reconstructed SVD transformer with {n_components} components from "
+                        f"{data_path.name} {df_original.shape} ({len(self.rf_columns)} RF columns, "
+                        f"variance explained {self.svd_transformer.explained_variance_ratio_.sum():.3f})")
             
+            self._save_svd_cache(cache_path, _svd_source_key(data_path, n_components))
             return True
             
         except FileNotFoundError:
-            safe_print(f"Clustering data file not found: {data_path}")
+            logger.error(f"Clustering data file not found: {data_path}")
             return False
         except Exception as e:
-            safe_print(f"Error reconstructing SVD: {e}")
+            logger.error(f"Error reconstructing SVD: {e}")
             return False
     
+    def _save_svd_cache(self, cache_path, source_key):
+        """Persist the fitted components so later starts skip the CSV read and refit"""
+        try:
+            np.savez(cache_path,
+                     source_key=source_key,
+                     rf_columns=np.array(self.rf_columns),
+                     components=self.svd_transformer.components_,
+                     explained_variance_ratio=self.svd_transformer.explained_variance_ratio_)
+            logger.info(f"Saved SVD components to {cache_path.name}")
+        except OSError as e:
+            # Read-only model directory: keep working, just refit next time
+            logger.warning(f"Could not save SVD components: {e}")
+    
+    def _build_feature_lookups(self):
+        """Resolve feature_columns to positions once, instead of per prediction"""
+        self._age_idx = None
+        self._gender_idx = None
+        feat_idx, comp_idx = [], []
+        for i, feature_name in enumerate(self.feature_columns):
+            if feature_name == 'Gender':
+                self._gender_idx = i
+            elif feature_name == 'Age':
+                self._age_idx = i
+            elif feature_name.startswith('SVD_Component_'):
+                feat_idx.append(i)
+                comp_idx.append(int(feature_name.split('_')[-1]) - 1)  # Convert to 0-based index
+        self._svd_feat_idx = np.array(feat_idx, dtype=np.intp)
+        self._svd_comp_idx = np.array(comp_idx, dtype=np.intp)
+        
+        # Trained models list SVD_Component_1..N as one consecutive block, so the
+        # scatter specializes to a single slice copy (no index gathers)
+        self._svd_slices = None
+        n = len(feat_idx)
+        if (n and feat_idx == list(range(feat_idx[0], feat_idx[0] + n))
+                and comp_idx == list(range(comp_idx[0], comp_idx[0] + n))):
+            self._svd_slices = (slice(feat_idx[0], feat_idx[0] + n),
+                                slice(comp_idx[0], comp_idx[0] + n))
+    
+    def _build_rf_lookups(self):
+        """Precompute RF column lookups used by prepare_patient_rf_data"""
+        self._rf_index = {rf_col: i for i, rf_col in enumerate(self.rf_columns)}
+        self._rf_names = [rf_col.replace('RF_', '').lower().replace('_', ' ')
+                          for rf_col in self.rf_columns]
+        self._condition_index = {}
+    
+    def _match_condition(self, condition):
+        """Position of the first RF column matching ``condition`` (flexible matching)"""
+        key = condition.lower()
+        try:
+            return self._condition_index[key]
+        except KeyError:
+            pass
+        match = None
+        for i, rf_name in enumerate(self._rf_names):
+            if key in rf_name or rf_name in key:
+                match = i
+                break
+        if len(self._condition_index) >= 4096:
+            self._condition_index.clear()
+        self._condition_index[key] = match
+        return match
+    
     def prepare_patient_rf_data(self, patient_conditions):
         """
         Convert patient's medical conditions to RF factor binary vector
@@ -114,26 +276,26 @@ class SVDNutritionalRiskPredictor:
         """
         
         # Initialize RF vector with zeros
-        rf_vector = np.zeros(len(self.rf_columns))
-        
+        rf_vector = np.zeros(len(self.rf_columns), dtype=np.float32)
+        self._fill_rf_vector(patient_conditions, rf_vector)
+        return rf_vector.reshape(1, -1)  # Return as 2D array for SVD
+    
+    def _fill_rf_vector(self, patient_conditions, rf_vector):
+        """Set the RF entries named by patient_conditions in a zeroed 1D vector"""
         if isinstance(patient_conditions, dict):
             # Patient conditions provided as dict with RF column names
-            for i, rf_col in enumerate(self.rf_columns):
-                rf_vector[i] = patient_conditions.get(rf_col, 0)
+            for rf_col, value in patient_conditions.items():
+                i = self._rf_index.get(rf_col)
+                if i is not None:
+                    rf_vector[i] = value
                 
         elif isinstance(patient_conditions, list):
             # Patient conditions provided as list of condition names
-            # Map condition names to RF columns
+            # Map condition names to RF columns; matches are memoized per name
             for condition in patient_conditions:
-                # Find matching RF columns (flexible matching)
-                for i, rf_col in enumerate(self.rf_columns):
-                    # Remove RF_ prefix and convert to lowercase for matching
-                    rf_name = rf_col.replace('RF_', '').lower().replace('_', ' ')
-                    if condition.lower() in rf_name or rf_name in condition.lower():
-                        rf_vector[i] = 1
-                        break
-        
-        return rf_vector.reshape(1, -1)  # Return as 2D array for SVD
+                i = self._match_condition(condition)
+                if i is not None:
+                    rf_vector[i] = 1
     
     def transform_to_svd_space(self, rf_vector):
         """
@@ -151,28 +313,67 @@ class SVDNutritionalRiskPredictor:
         Prepare complete feature vector for model prediction
         """
         
+        # Copy out of the per-thread scratch buffer; the caller keeps the array
+        return self._features_and_components(age, gender, patient_conditions)[0].copy()
+    
+    def _scratch_buffers(self):
+        """This thread's reusable (rf_vector, svd_row, feature_row) buffers"""
+        n_rf, n_features = len(self.rf_columns), len(self.feature_columns)
+        n_svd = self.svd_transformer.components_.shape[0]
+        buffers = getattr(self._scratch_local, 'buffers', None)
+        if buffers is None or (buffers[0].shape[0], buffers[1].shape[1], buffers[2].shape[1]) != (n_rf, n_svd, n_features):
+            buffers = (np.zeros(n_rf, dtype=np.float32),
+                       np.empty((1, n_svd), dtype=np.float32),
+                       np.zeros((1, n_features), dtype=np.float32))
+            self._scratch_local.buffers = buffers
+        return buffers
+    
+    def _features_and_components(self, age, gender, patient_conditions):
+        """
+        Feature vector plus the SVD components it was built from
+        
+        Both are views of this thread's scratch buffers and are overwritten
+        by the thread's next call: read them, don't keep them.
+        """
+        if not isinstance(self.svd_transformer, SVDProjection):
+            # Generic transformer: no out= support, allocate as usual
+            rf_vector = self.prepare_patient_rf_data(patient_conditions)
+            svd_components = self.transform_to_svd_space(rf_vector)
+            feature_vector = self._assemble_features([age], [gender], svd_components.reshape(1, -1))
+            return feature_vector, svd_components
+        
+        rf_vector, svd_row, feature_row = self._scratch_buffers()
+        
         # Convert patient conditions to RF factors and then to SVD space
-        rf_vector = self.prepare_patient_rf_data(patient_conditions)
-        svd_components = self.transform_to_svd_space(rf_vector)
+        rf_vector.fill(0)
+        self._fill_rf_vector(patient_conditions, rf_vector)
+        np.dot(rf_vector.reshape(1, -1), self.svd_transformer._components_T, out=svd_row)
+        
+        self._assemble_features([age], [gender], svd_row, out=feature_row)  # 2D array for model
+        return feature_row, svd_row[0]
+    
+    def _assemble_features(self, ages, genders, svd_matrix, out=None):
+        """Combine demographics and SVD components in training column order (one row per patient)"""
         
         # Prepare demographic features
-        gender_male = 1 if gender.lower() == 'male' else 0
+        gender_male = [1 if gender.lower() == 'male' else 0 for gender in genders]
         
-        # Combine features in the same order as training
-        feature_vector = np.zeros(len(self.feature_columns))
+        # Only the Age/Gender/SVD positions are ever written, so a reused
+        # ``out`` buffer keeps its other columns at zero
+        feature_matrix = out if out is not None else np.zeros((len(svd_matrix), len(self.feature_columns)), dtype=np.float32)
         
-        for i, feature_name in enumerate(self.feature_columns):
-            if feature_name == 'Gender':
-                feature_vector[i] = gender_male
-            elif feature_name == 'Age':
-                feature_vector[i] = age
-            elif feature_name.startswith('SVD_Component_'):
-                # Extract component number
-                comp_num = int(feature_name.split('_')[-1]) - 1  # Convert to 0-based index
-                if comp_num < len(svd_components):
-                    feature_vector[i] = svd_components[comp_num]
+        if self._gender_idx is not None:
+            feature_matrix[:, self._gender_idx] = gender_male
+        if self._age_idx is not None:
+            feature_matrix[:, self._age_idx] = ages
+        if self._svd_slices is not None and self._svd_slices[1].stop <= svd_matrix.shape[1]:
+            feat_slice, comp_slice = self._svd_slices
+            feature_matrix[:, feat_slice] = svd_matrix[:, comp_slice]
+        else:
+            in_range = self._svd_comp_idx < svd_matrix.shape[1]
+            feature_matrix[:, self._svd_feat_idx[in_range]] = svd_matrix[:, self._svd_comp_idx[in_range]]
         
-        return feature_vector.reshape(1, -1)  # Return as 2D array for model
+        return feature_matrix
     
     def predict_patient_risk(self, age, gender, patient_conditions, include_details=True):
         """
@@ -188,98 +389,150 @@ class SVDNutritionalRiskPredictor:
         - dict with prediction results
         """
         
+        # Dashboards re-score the same patients on every refresh, so identical
+        # inputs are answered from an LRU cache (copied: callers may mutate)
+        key = _conditions_key(patient_conditions)
+        if key is not None and self._cached_prediction is not None:
+            # Feature assembly lowercases gender, so 'Male' and 'male' share an entry
+            gender_key = gender.lower() if isinstance(gender, str) else gender
+            try:
+                result = self._cached_prediction(age, gender_key, key, include_details)
+            except TypeError:
+                pass  # unhashable age/gender/condition values: predict uncached
+            except Exception as e:
+                # Failures propagate out of the cache, so they are never stored
+                return {'error': f"Prediction failed: {e}"}
+            else:
+                result = copy.deepcopy(result)
+                result['gender'] = gender  # echo the caller's spelling
+                return result
+        return self._predict_patient_risk(age, gender, patient_conditions, include_details)
+    
+    def _predict_from_key(self, age, gender, key, include_details):
+        kind, items = key
+        patient_conditions = dict(items) if kind == 'dict' else list(items)
+        return self._score_patient(age, gender, patient_conditions, include_details)
+    
+    def _predict_patient_risk(self, age, gender, patient_conditions, include_details):
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_trained_components() first.")
+        
+        try:
+            return self._score_patient(age, gender, patient_conditions, include_details)
+        except Exception as e:
+            return {'error': f"Prediction failed: {e}"}
+    
+    def _score_patient(self, age, gender, patient_conditions, include_details):
+        """Predict one patient; raises on bad input instead of returning an error dict"""
+        # Prepare feature vector (SVD components are kept for the details below)
+        feature_vector, svd_components = self._features_and_components(age, gender, patient_conditions)
+        
+        # Apply scaling if required
+        if self.requires_scaling:
+            feature_vector = self.scaler.transform(feature_vector)
+        
+        # Get predictions
+        risk_probability = self.model.predict_proba(feature_vector)[0, 1]
+        risk_prediction = self.model.predict(feature_vector)[0]
+        
+        results = self._format_result(age, gender, risk_probability, risk_prediction)
+        
+        if include_details:
+            self._add_details(results, age, gender, svd_components, risk_probability,
+                              len(feature_vector[0]))
+        
+        return results
+    
+    def predict_patient_risk_batch(self, patients, include_details=False):
+        """
+        Predict risk for many patients with one SVD transform and one model call
+        
+        Parameters:
+        - patients: list of dicts (or DataFrame) with 'age', 'gender' and
+          'patient_conditions' entries, as taken by predict_patient_risk
+        - include_details: whether to include detailed explanation
+        
+        Returns:
+        - list of result dicts, in input order
+        """
+        
         if self.model is None:
             raise ValueError("Model not loaded. Call load_trained_components() first.")
         
+        if isinstance(patients, pd.DataFrame):
+            patients = patients.to_dict('records')
+        if len(patients) == 0:
+            return []
+        
         try:
-            # Prepare feature vector
-            feature_vector = self.prepare_full_feature_vector(age, gender, patient_conditions)
+            ages = [p['age'] for p in patients]
+            genders = [p['gender'] for p in patients]
+            rf_matrix = np.vstack([self.prepare_patient_rf_data(p['patient_conditions']) for p in patients])
+            if self.svd_transformer is None:
+                raise ValueError("SVD transformer not loaded. Call load_trained_components() first.")
+            svd_matrix = self.svd_transformer.transform(rf_matrix)
+            feature_matrix = self._assemble_features(ages, genders, svd_matrix)
             
-            # Apply scaling if required
             if self.requires_scaling:
-                feature_vector = self.scaler.transform(feature_vector)
-            
-            # Get predictions
-            risk_probability = self.model.predict_proba(feature_vector)[0, 1]
-            risk_prediction = self.model.predict(feature_vector)[0]
-            
-            # Determine risk level
-            risk_assessment = self._assess_risk_level(risk_probability)
-            
-            results = {
-                'age': age,
-                'gender': gender,
-                'risk_probability': round(risk_probability, 3),
-                'risk_prediction': int(risk_prediction),
-                'risk_level': risk_assessment['level'],
-                'risk_category': risk_assessment['category'],
-                'recommendations': risk_assessment['recommendations'],
-                'model_confidence': self._calculate_confidence(risk_probability)
-            }
+                feature_matrix = self.scaler.transform(feature_matrix)
             
+            risk_probabilities = self.model.predict_proba(feature_matrix)[:, 1]
+            risk_predictions = self.model.predict(feature_matrix)
+        except Exception:
+            # A bad record fails the whole stacked call; score row by row so
+            # only that patient gets an error entry
+            return [self.predict_patient_risk(p.get('age'), p.get('gender'),
+                                              p.get('patient_conditions'), include_details)
+                    for p in patients]
+        
+        results = []
+        for i, (age, gender) in enumerate(zip(ages, genders)):
+            result = self._format_result(age, gender, risk_probabilities[i], risk_predictions[i])
             if include_details:
-                # Get SVD components for interpretation
-                rf_vector = self.prepare_patient_rf_data(patient_conditions)
-                svd_components = self.transform_to_svd_space(rf_vector)
-                
-                results['technical_details'] = {
-                    'svd_components': {f'Component_{i+1}': round(comp, 3) 
-                                     for i, comp in enumerate(svd_components[:5])},
-                    'model_type': self.model_package['model_type'],
-                    'requires_scaling': self.requires_scaling,
-                    'feature_vector_length': len(feature_vector[0])
-                }
-                
-                results['clinical_interpretation'] = self._generate_clinical_interpretation(
-                    age, gender, svd_components, risk_probability
-                )
-            
-            return results
-            
-        except Exception as e:
-            return {'error': f"Prediction failed: {e}"}
+                self._add_details(result, age, gender, svd_matrix[i], risk_probabilities[i],
+                                  feature_matrix.shape[1])
+            results.append(result)
+        return results
+    
+    def _format_result(self, age, gender, risk_probability, risk_prediction):
+        """Build the per-patient result dict from a predicted probability/class"""
+        
+        # Determine risk level
+        risk_assessment = self._assess_risk_level(risk_probability)
+        
+        return {
+            'age': age,
+            'gender': gender,
+            'risk_probability': round(risk_probability, 3),
+            'risk_prediction': int(risk_prediction),
+            'risk_level': risk_assessment['level'],
+            'risk_category': risk_assessment['category'],
+            'recommendations': risk_assessment['recommendations'],
+            'model_confidence': self._calculate_confidence(risk_probability)
+        }
+    
+    def _add_details(self, results, age, gender, svd_components, risk_probability, feature_vector_length):
+        """Attach technical details and clinical interpretation to a result dict"""
+        # One vectorized round in float64 instead of round() per NumPy scalar;
+        # .tolist() hands back plain floats (0.039, not float32's 0.0390000008)
+        leading = np.round(np.asarray(svd_components[:5], dtype=np.float64), 3).tolist()
+        results['technical_details'] = {
+            'svd_components': {f'Component_{i+1}': comp for i, comp in enumerate(leading)},
+            'model_type': self.model_package['model_type'],
+            'requires_scaling': self.requires_scaling,
+            'feature_vector_length': feature_vector_length
+        }
+        
+        results['clinical_interpretation'] = self._generate_clinical_interpretation(
+            age, gender, svd_components, risk_probability
+        )
     
     def _assess_risk_level(self, probability):
-        """Assess risk level and generate recommendations"""
-        
-        if probability >= 0.80:
-            level = "VERY HIGH"
-            category = "Immediate Intervention Required"
-            recommendations = [
-                "🚨 Complete comprehensive nutritional assessment within 24 hours",
-                "🍎 Schedule immediate dietitian consultation",
-                "📊 Initiate daily weight monitoring",
-                "💊 Consider nutritional supplements",
-                "👥 Coordinate multidisciplinary care team"
-            ]
-        elif probability >= 0.60:
-            level = "HIGH"
-            category = "Enhanced Monitoring Required"
-            recommendations = [
-                "⚠️ Complete MUST assessment within 48 hours",
-                "🍎 Schedule dietitian consultation within 1 week",
-                "📊 Implement bi-weekly weight monitoring",
-                "🍽️ Review dietary intake patterns"
-            ]
-        elif probability >= 0.40:
-            level = "MODERATE"
-            category = "Routine Enhanced Screening"
-            recommendations = [
-                "📋 Complete standard MUST assessment",
-                "🍽️ Review dietary preferences and intake",
-                "📊 Monthly weight monitoring",
-                "👀 Staff awareness of nutritional concerns"
-            ]
-        else:
-            level = "LOW"
-            category = "Standard Care"
-            recommendations = [
-                "✅ Continue routine nutritional care",
-                "📊 Quarterly weight checks",
-                "📅 Routine MUST screening per protocol"
-            ]
-        
-        return {'level': level, 'category': category, 'recommendations': recommendations}
+        """Assess risk level and generate recommendations (shared, read-only result)"""
+        for threshold, assessment in _RISK_LEVELS:
+            if probability >= threshold:
+                return assessment
+        return _RISK_LEVELS[-1][1]
     
     def _calculate_confidence(self, probability):
         """Calculate prediction confidence"""
@@ -325,23 +578,44 @@ class SVDNutritionalRiskPredictor:
         
         return interpretation
 
+_predictor_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _get_predictor():
+    predictor = SVDNutritionalRiskPredictor()
+    if not predictor.load_trained_components():
+        # Raising keeps the failure out of the cache, so the next call retries
+        raise RuntimeError("Failed to load trained components")
+    return predictor
+
+def get_predictor():
+    """Load the risk predictor once per process; concurrent first calls wait for one load"""
+    with _predictor_lock:
+        return _get_predictor()
+
 # =====================================================
 # DEMONSTRATION WITH DIFFERENT PATIENT EXAMPLES
 # =====================================================
 
+_DEMO_BANNER = "\n".join([
+    "",
+    "=" * 55,
+    "DEMONSTRATION: SVD PIPELINE PREDICTION",
+    "=" * 55,
+    "",
+    "1. LOADING TRAINED MODEL AND SVD COMPONENTS",
+    "-" * 50,
+])
+
 def demonstrate_svd_prediction_pipeline():
     """Demonstrate the complete SVD prediction pipeline"""
     
-    print("\n" + "=" * 55)
-    print("DEMONSTRATION: SVD PIPELINE PREDICTION")
-    print("=" * 55)
+    print(_DEMO_BANNER)
     
-    # Initialize predictor
-    predictor = SVDNutritionalRiskPredictor()
-    
-    # Load trained components
-    success = predictor.load_trained_components()
-    if not success:
+    # Load trained components (shared with the API's predictor if already loaded)
+    try:
+        predictor = get_predictor()
+    except RuntimeError:
         print("Failed to load trained components. Cannot proceed with demonstration.")
         return
     
@@ -388,16 +662,18 @@ def demonstrate_svd_prediction_pipeline():
         )
         
         if 'error' in result:
-            print(f"❌ Prediction failed: {result['error']}")
+            print(f"[ERROR] Prediction failed: {result['error']}")
             continue
         
-        # Display results
-        print("\nPATIENT SUMMARY:")
-        print(f"  Age: {result['age']}, Gender: {result['gender'].title()}")
-        print(f"  Risk Probability: {result['risk_probability']:.1%}")
-        print(f"  Risk Level: {result['risk_level']}")
-        print(f"  Category: {result['risk_category']}")
-        print(f"  Model Confidence: {result['model_confidence']}")
+        # Display results (one write per patient)
+        print("\n".join([
+            "\nPATIENT SUMMARY:",
+            f"  Age: {result['age']}, Gender: {result['gender'].title()}",
+            f"  Risk Probability: {result['risk_probability']:.1%}",
+            f"  Risk Level: {result['risk_level']}",
+            f"  Category: {result['risk_category']}",
+            f"  Model Confidence: {result['model_confidence']}",
+        ]))
         
         # print("\nTECHNICAL DETAILS:")
         # tech_details = result['technical_details']
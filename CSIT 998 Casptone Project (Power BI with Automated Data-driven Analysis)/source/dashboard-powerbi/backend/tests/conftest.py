@@ -1,5 +1,5 @@
 from __future__ import annotations
-import types, tempfile, sys
+import functools, importlib.util, re, threading, types, tempfile, sys
 from pathlib import Path
 import os
 from datetime import datetime
@@ -10,6 +10,31 @@ from fastapi.testclient import TestClient
 
 # Minimal fake DB (stateless)
 
+# (pattern, handler) pairs tried in order; a handler returns
+# (rows, rowcount, lastrowid increment). Rows are rebuilt per call.
+_DISPATCH = [
+    # ---- Categories (list/create/uniqueness/delete) ----
+    # Plain listing: no WHERE/COUNT/JOIN; tests only assert 200/ok and POST echo
+    (re.compile(r"^(?!.*(?:WHERE|COUNT|JOIN)).*FROM `category`", re.S),
+     lambda: ([{'id': 1, 'category': 'Digestive'}, {'id': 2, 'category': 'General'}], 0, 0)),
+    # Uniqueness check returns None → no duplicate
+    (re.compile(re.escape("SELECT `id`, `category` FROM `category` WHERE LOWER(`category`)=LOWER")),
+     lambda: (None, 0, 0)),
+    (re.compile(re.escape("INSERT INTO `category`")), lambda: ([], 1, 1)),
+    (re.compile(re.escape("DELETE FROM `category` WHERE `id`=")), lambda: ([], 1, 0)),
+
+    # ---- Data stats used by /api/data/stats (nonfunctional) ----
+    (re.compile(re.escape("SELECT COUNT(*) AS cnt FROM `data`")), lambda: ({'cnt': 10}, 0, 0)),
+    (re.compile(re.escape("SELECT COUNT(DISTINCT NULLIF(TRIM(`PersonID`)")), lambda: ({'cnt': 5}, 0, 0)),
+
+    # Pretend all rows were inserted
+    (re.compile(re.escape("INSERT INTO `data` (")), lambda: ([], 2, 0)),
+
+    # ---- Risk columns / simple selects that routes may use ----
+    (re.compile(re.escape("FROM `data` WHERE")),
+     lambda: ([{'risk': 'bruise, pain'}, {'risk': 'constipation'}], 0, 0)),
+]
+
 class _FakeCursor:
     def __init__(self):
         self._rows = []
@@ -17,45 +42,20 @@ class _FakeCursor:
         self.rowcount = 0
 
     def execute(self, sql: str, params=None):
-        self.rowcount = 0
-
-        # ---- Categories (list/create/uniqueness/delete) ----
-        if "FROM `category`" in sql and "WHERE" not in sql and "COUNT" not in sql and "JOIN" not in sql:
-            # Return a small static list; tests only assert 200/ok and POST echo
-            self._rows = [{'id': 1, 'category': 'Digestive'}, {'id': 2, 'category': 'General'}]
-        elif "SELECT `id`, `category` FROM `category` WHERE LOWER(`category`)=LOWER" in sql:
-            # Uniqueness check returns None → no duplicate
-            self._rows = None
-        elif "INSERT INTO `category`" in sql:
-            self._lastrowid += 1
-            self.rowcount = 1
-            self._rows = []
-        elif "DELETE FROM `category` WHERE `id`=" in sql:
-            self.rowcount = 1
-            self._rows = []
-
-        # ---- Data stats used by /api/data/stats (nonfunctional) ----
-        elif "SELECT COUNT(*) AS cnt FROM `data`" in sql:
-            self._rows = {'cnt': 10}
-        elif "SELECT COUNT(DISTINCT NULLIF(TRIM(`PersonID`)" in sql:
-            self._rows = {'cnt': 5}
-
-        elif "INSERT INTO `data` (" in sql:
-            # Pretend all rows were inserted
-            self.rowcount = 2
-            self._rows = []
-
-        # ---- Risk columns / simple selects that routes may use ----
-        elif "FROM `data` WHERE" in sql:
-            self._rows = [{'risk': 'bruise, pain'}, {'risk': 'constipation'}]
-
-        else:
-            self._rows = []
-
+        self._rows, self.rowcount = [], 0
+        for pattern, handler in _DISPATCH:
+            if pattern.search(sql):
+                self._rows, self.rowcount, new_ids = handler()
+                self._lastrowid += new_ids
+                break
         return self
 
     def executemany(self, sql, seq):
-        self.rowcount = len(list(seq))
+        try:
+            self.rowcount = len(seq)
+        except TypeError:
+            # Generators: count without materializing a copy
+            self.rowcount = sum(1 for _ in seq)
 
     def fetchall(self):
         if isinstance(self._rows, list):
@@ -93,8 +93,16 @@ EXPECTED_COLUMNS = [
 ]
 
 def get_db_columns(_conn): return EXPECTED_COLUMNS
-def map_expected_to_db_columns(db_cols): return {c: c for c in EXPECTED_COLUMNS if c in db_cols}
-def map_csv_headers_to_expected(csv_cols): return {c: (c if c in csv_cols else None) for c in EXPECTED_COLUMNS}
+def map_expected_to_db_columns(db_cols):
+    db_set = set(db_cols)
+    return {c: c for c in EXPECTED_COLUMNS if c in db_set}
+def map_csv_headers_to_expected(csv_cols):
+    csv_set = set(csv_cols)
+    return {c: (c if c in csv_set else None) for c in EXPECTED_COLUMNS}
+
+def build_csv_to_db_mapping(csv_cols, db_cols):
+    csv_map, db_map = map_csv_headers_to_expected(csv_cols), map_expected_to_db_columns(db_cols)
+    return {csv_map[c]: db_map[c] for c in EXPECTED_COLUMNS if csv_map.get(c) and db_map.get(c)}
 
 def parse_date_to_iso(val):
     s = "" if val is None else str(val).strip()
@@ -105,34 +113,54 @@ def parse_date_to_iso(val):
     except Exception:
         return None
 
+def parse_date_series(series): return series.map(parse_date_to_iso)
+
 def ensure_models_loaded(): return True  # for /healthz
+def bulk_load_enabled(): return False
 def normalize_token(s): return (s or "").strip().lower()
 def parse_risk_factors(s: str): return [p.strip() for p in (s or "").split(",") if p.strip()]
+def parse_risk_factors_series(series): return series.map(parse_risk_factors)
 
 class _Predictor:
     def predict_patient_risk(self, age, gender, patient_conditions, include_details=False):
         return {"score": 0.42, "age": age, "gender": gender, "n_conds": len(patient_conditions or {})}
+    def predict_patient_risk_batch(self, patients, include_details=False):
+        return [self.predict_patient_risk(p["age"], p["gender"], p["patient_conditions"], include_details)
+                for p in patients]
 predictor = _Predictor()
+def get_predictor(): return predictor
 
 # Temp dir & paths used by import
 _TMP = Path(tempfile.gettempdir()) / "pytest_minimal"
 _TMP.mkdir(parents=True, exist_ok=True)
 UPLOAD_DIR   = _TMP
+HEATMAP_PATH = _TMP / "rf_conditions_heatmap.png"
+SIZES_PATH   = _TMP / "cluster_sizes.png"
+DEMOS_PATH   = _TMP / "demographics_comparison.png"
+DISPLAY_RENDER_LOCK = threading.Lock()
 
 # Install shims as the "shared" module (and alias to utils.shared used by app code)
 _fake_shared = types.ModuleType("shared")
 for k, v in {
     "get_db_connection": get_db_connection,
+    "bulk_load_enabled": bulk_load_enabled,
     "map_expected_to_db_columns": map_expected_to_db_columns,
     "map_csv_headers_to_expected": map_csv_headers_to_expected,
+    "build_csv_to_db_mapping": build_csv_to_db_mapping,
     "get_db_columns": get_db_columns,
     "EXPECTED_COLUMNS": EXPECTED_COLUMNS,
     "UPLOAD_DIR": UPLOAD_DIR,
+    "HEATMAP_PATH": HEATMAP_PATH,
+    "SIZES_PATH": SIZES_PATH,
+    "DEMOS_PATH": DEMOS_PATH,
+    "DISPLAY_RENDER_LOCK": DISPLAY_RENDER_LOCK,
     "parse_date_to_iso": parse_date_to_iso,
+    "parse_date_series": parse_date_series,
     "normalize_token": normalize_token,
     "parse_risk_factors": parse_risk_factors,
+    "parse_risk_factors_series": parse_risk_factors_series,
     "ensure_models_loaded": ensure_models_loaded,
-    "predictor": predictor,
+    "get_predictor": get_predictor,
 }.items():
     setattr(_fake_shared, k, v)
 sys.modules["shared"] = _fake_shared
@@ -152,19 +180,22 @@ for _p in [str(_BACKEND_DIR), str(_ROOT_DIR)]:
 
 @pytest.fixture
 def app() -> FastAPI:
-    return FastAPI()
+    from utils.responses import NumpyJSONResponse
+    return FastAPI(default_response_class=NumpyJSONResponse)
 
 @pytest.fixture
 def client(app):
     return TestClient(app)
 
+@functools.lru_cache(maxsize=None)
+def _resolve(module_path: str):
+    """Import 'routes.xxx' once, or 'backend.routes.xxx' when run from repo root."""
+    if importlib.util.find_spec(module_path.partition(".")[0]) is None:
+        module_path = f"backend.{module_path}"
+    return importlib.import_module(module_path)
+
 def mount_router(app: FastAPI, module_path: str, attr: str = "router"):
     """Include a router from 'routes.xxx' into a fresh app."""
-    try:
-        mod = __import__(module_path, fromlist=[attr])
-    except ModuleNotFoundError:
-        # Fallback to 'backend.routes.xxx' when tests run from repo root
-        alt = f"backend.{module_path}"
-        mod = __import__(alt, fromlist=[attr])
+    mod = _resolve(module_path)
     app.include_router(getattr(mod, attr))
     return app
@@ -0,0 +1,77 @@
+import pytest
+
+PATIENTS = [
+    {"age": 89, "gender": "female", "patient_conditions": {"RF_dementia": 1, "RF_frailty": 1, "RF_pain": 1}},
+    {"age": 72, "gender": "male", "patient_conditions": {"RF_hypertension": 1}},
+    {"age": 60, "gender": "Male", "patient_conditions": ["pain", "dry skin"]},
+    {"age": 95, "gender": "female", "patient_conditions": {}},
+]
+
+RF_FEATURES = [
+    {"RF_pain": 1, "RF_dry_skin": 1},
+    {},
+    {"RF_dementia": 1, "RF_confusion": 1, "not_an_rf_column": 1},
+]
+
+@pytest.fixture(scope="module")
+def predictor():
+    from services.model_usage import SVDNutritionalRiskPredictor
+    p = SVDNutritionalRiskPredictor()
+    assert p.load_trained_components()
+    return p
+
+@pytest.fixture(scope="module")
+def cluster_models():
+    from services import cluster_usage
+    svd, clu, rfs, interp = cluster_usage.load_patient_models()
+    assert svd is not None and clu is not None
+    return svd, clu, rfs, interp
+
+@pytest.mark.parametrize("include_details", [False, True])
+def test_risk_batch_matches_single_predictions(predictor, include_details):
+    single = [predictor.predict_patient_risk(p["age"], p["gender"], p["patient_conditions"], include_details)
+              for p in PATIENTS]
+    batch = predictor.predict_patient_risk_batch(PATIENTS, include_details=include_details)
+    assert batch == single
+    assert not any("error" in r for r in batch)
+
+def test_risk_batch_isolates_a_failing_row(predictor):
+    bad = {"age": 70, "gender": None, "patient_conditions": {}}
+    batch = predictor.predict_patient_risk_batch(PATIENTS[:2] + [bad] + PATIENTS[2:])
+
+    # Only the bad patient gets an error entry; the others are still scored
+    assert "error" in batch[2]
+    good = batch[:2] + batch[3:]
+    assert good == predictor.predict_patient_risk_batch(PATIENTS)
+
+def test_cluster_batch_matches_single_classification(cluster_models):
+    from services import cluster_usage
+    svd, clu, rfs, interp = cluster_models
+    ids = [f"p{i}" for i in range(len(RF_FEATURES))]
+    single = [cluster_usage.classify_patient(f, svd, clu, rfs, interp, patient_id=pid)
+              for f, pid in zip(RF_FEATURES, ids)]
+    batch = cluster_usage.classify_patients_batch(RF_FEATURES, svd, clu, rfs, interp, patient_ids=ids)
+
+    assert len(batch) == len(single)
+    for b, s in zip(batch, single):
+        assert b.keys() == s.keys()
+        assert b["confidence_score"] == pytest.approx(s["confidence_score"], abs=1e-5)
+        assert {k: v for k, v in b.items() if k != "confidence_score"} == \
+               {k: v for k, v in s.items() if k != "confidence_score"}
+
+def test_risk_cache_ignores_gender_case(predictor):
+    conditions = {"RF_pain": 1, "RF_frailty": 1}
+    lower = predictor.predict_patient_risk(81, "male", conditions, include_details=False)
+    size = predictor._cached_prediction.cache_info().currsize
+    upper = predictor.predict_patient_risk(81, "Male", conditions, include_details=False)
+
+    assert predictor._cached_prediction.cache_info().currsize == size
+    assert upper["gender"] == "Male"  # caller's spelling is echoed back
+    assert {**upper, "gender": "male"} == lower
+
+def test_risk_errors_are_not_cached(predictor):
+    size = predictor._cached_prediction.cache_info().currsize
+    result = predictor.predict_patient_risk("not an age", "female", {"RF_pain": 1}, include_details=False)
+
+    assert "error" in result
+    assert predictor._cached_prediction.cache_info().currsize == size
@@ -0,0 +1,36 @@
+import importlib
+from starlette import status
+
+def _mount(app):
+    from conftest import mount_router
+    mount_router(app, "routes.cleanup_routes")
+
+def test_cleanup_background_returns_202_and_queues_task(client, app, monkeypatch):
+    _mount(app)
+    mod = importlib.import_module("routes.cleanup_routes")
+
+    # Record the scheduled call instead of touching the uploads directory
+    calls = []
+    def fake_cleanup(upload_dir, max_age_hours, max_size_mb):
+        calls.append((upload_dir, max_age_hours, max_size_mb))
+    monkeypatch.setattr(mod, "scheduled_cleanup", fake_cleanup)
+
+    r = client.post("/api/cleanup/run/background", json={"max_age_hours": 12, "max_size_mb": 100})
+    assert r.status_code == status.HTTP_202_ACCEPTED
+    body = r.json()
+    assert body["ok"] is True and body["queued"] is True
+    assert body["config"] == {"max_age_hours": 12, "max_size_mb": 100}
+    # TestClient runs background tasks before returning the response
+    assert calls == [(mod.UPLOAD_DIR, 12, 100)]
+
+def test_cleanup_background_rejects_dry_run(client, app, monkeypatch):
+    _mount(app)
+    mod = importlib.import_module("routes.cleanup_routes")
+
+    calls = []
+    monkeypatch.setattr(mod, "scheduled_cleanup", lambda *args: calls.append(args))
+
+    r = client.post("/api/cleanup/run/background", json={"dry_run": True})
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert "preview" in r.json()["detail"]
+    assert calls == []
@@ -0,0 +1,50 @@
+import importlib
+from starlette import status
+
+INTERPRETATIONS = {
+    0: {"size": 91, "avg_age": 86.7, "must_score": 1.5, "phenotype": "Mobility-Dominant",
+        "top_rf_conditions": {"RF_pain": 0.99, "RF_dry_skin": 0.85}},
+    1: {"size": 88, "avg_age": 84.2, "must_score": 0.9, "phenotype": "Cognitive",
+        "top_rf_conditions": {"RF_dementia": 0.95, "RF_pain": 0.40}},
+}
+
+def _mount(app):
+    from conftest import mount_router
+    mount_router(app, "routes.cluster_display_routes")
+
+def test_render_all_uses_lock_and_reports_charts(client, app, monkeypatch):
+    _mount(app)
+    mod = importlib.import_module("routes.cluster_display_routes")
+    paths = (mod.HEATMAP_PATH, mod.SIZES_PATH, mod.DEMOS_PATH)
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+    # Stand in for the process pool: note the lock state and write the files
+    calls = []
+    def fake_render_all(arrays):
+        calls.append((arrays, mod.DISPLAY_RENDER_LOCK.locked()))
+        for path in paths:
+            path.write_bytes(b"png")
+    monkeypatch.setattr(mod, "_cluster_arrays", lambda: "arrays")
+    monkeypatch.setattr(mod.cluster_display, "render_all_charts", fake_render_all)
+
+    r = client.post("/cluster/display/render")
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {"ok": True, "charts": [path.name for path in paths]}
+    assert calls == [("arrays", True)]
+    assert not mod.DISPLAY_RENDER_LOCK.locked()
+
+    # Charts already on disk: nothing is rendered again
+    r = client.post("/cluster/display/render")
+    assert r.status_code == status.HTTP_200_OK
+    assert len(calls) == 1
+
+def test_render_one_writes_chart_and_returns_png():
+    from services import cluster_service
+    arrays = cluster_service.prepare_cluster_arrays(INTERPRETATIONS)
+    cluster_service.SIZES_PATH.unlink(missing_ok=True)
+
+    name, data = cluster_service._render_one(("sizes", arrays))
+    assert name == "sizes"
+    assert data.startswith(b"\x89PNG")
+    assert cluster_service.SIZES_PATH.read_bytes() == data
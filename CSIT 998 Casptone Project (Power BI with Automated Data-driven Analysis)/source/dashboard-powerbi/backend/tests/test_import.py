@@ -1,4 +1,7 @@
+import importlib
 import io
+import pymysql
+import pytest
 
 CSV = (
     "PersonID,Start date,End date,M-Risk Factors,Gender,Age,MNA,BMI,Weight\n"
@@ -20,3 +23,91 @@ def test_import_preview_and_commit(client, app):
     assert com.status_code == 200 and com.json()["inserted"] == 2
 
 
+def _upload(client, csv_text=CSV):
+    files = {'file': ('data.csv', io.BytesIO(csv_text.encode('utf-8')), 'text/csv')}
+    return client.post("/api/import/preview", files=files).json()["token"]
+
+@pytest.fixture
+def load_data(monkeypatch):
+    """Enable the LOAD DATA path and record what reaches the fake cursor."""
+    from conftest import _FakeCursor
+    mod = importlib.import_module("routes.import_routes")
+    monkeypatch.setattr(mod, "bulk_load_enabled", lambda: True)
+    seen = {"files": [], "executemany": 0, "refuse": None, "warnings": (), "sql": []}
+
+    execute, executemany = _FakeCursor.execute, _FakeCursor.executemany
+    def fake_execute(self, sql, params=None):
+        seen["sql"].append(sql)
+        if not sql.startswith("LOAD DATA LOCAL INFILE"):
+            return execute(self, sql, params)
+        if seen["refuse"]:
+            raise pymysql.err.OperationalError(seen["refuse"], "Loading local data is disabled")
+        # The temp file is removed after the statement, so read it now
+        with open(params[0], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        seen["files"].append(lines)
+        self.rowcount = len(lines)
+        return self
+    def fake_executemany(self, sql, seq):
+        seen["executemany"] += 1
+        return executemany(self, sql, seq)
+    # cursor.connection.show_warnings() reports what the server would
+    class _Conn:
+        def show_warnings(self):
+            return seen["warnings"]
+    monkeypatch.setattr(_FakeCursor, "connection", _Conn(), raising=False)
+    monkeypatch.setattr(_FakeCursor, "execute", fake_execute)
+    monkeypatch.setattr(_FakeCursor, "executemany", fake_executemany)
+    return mod, seen
+
+def test_import_commit_with_load_data(client, app, load_data):
+    _mount(app)
+    mod, seen = load_data
+    token = _upload(client)
+    com = client.post("/api/import/commit", json={"token": token, "mode": "append"})
+    assert com.status_code == 200 and com.json()["inserted"] == 2
+    assert seen["executemany"] == 0
+    assert seen["files"] == [[
+        '"1","2020-01-01","2020-02-01","pain","male",60.0,12.0,22.0,70.0',
+        '"2","2020-03-01","2020-03-10","constipation","female",82.0,13.0,21.0,55.0',
+    ]]
+    assert not list(mod.UPLOAD_DIR.glob("*.load.csv"))
+
+def test_import_commit_load_data_warnings_restore_backup(client, app, load_data):
+    _mount(app)
+    mod, seen = load_data
+    # e.g. an out-of-range value the server clipped instead of rejecting
+    seen["warnings"] = (("Warning", 1264, "Out of range value for column 'BMI' at row 2"),)
+    token = _upload(client)
+    com = client.post("/api/import/commit", json={"token": token, "mode": "overwrite"})
+    assert com.status_code == 500
+    assert "Out of range value" in com.json()["detail"]
+    restore = [s for s in seen["sql"] if s.startswith("INSERT INTO `data` SELECT * FROM `data_backup_")]
+    assert len(restore) == 1
+    assert not list(mod.UPLOAD_DIR.glob("*.load.csv"))
+
+def test_import_commit_loads_non_finite_numbers_as_null(client, app, load_data):
+    _mount(app)
+    mod, seen = load_data
+    token = _upload(client, CSV.replace(",22,70\n", ",inf,70\n"))
+    com = client.post("/api/import/commit", json={"token": token, "mode": "append"})
+    assert com.status_code == 200
+    assert seen["files"][0][0] == '"1","2020-01-01","2020-02-01","pain","male",60.0,12.0,NULL,70.0'
+
+@pytest.mark.parametrize("code", [1148, 2068, 3948])
+def test_import_commit_falls_back_when_load_data_refused(client, app, load_data, code):
+    _mount(app)
+    mod, seen = load_data
+    seen["refuse"] = code
+    token = _upload(client)
+    com = client.post("/api/import/commit", json={"token": token, "mode": "append"})
+    assert com.status_code == 200 and com.json()["inserted"] == 2
+    assert seen["executemany"] == 1
+    assert not list(mod.UPLOAD_DIR.glob("*.load.csv"))
+
+def test_load_data_field_quoting():
+    mod = importlib.import_module("routes.import_routes")
+    assert mod._load_data_field(None) == 'NULL'
+    assert mod._load_data_field(1.5) == '1.5'
+    assert mod._load_data_field('NULL') == '"NULL"'
+    assert mod._load_data_field('say "hi"') == '"say ""hi"""'
@@ -43,7 +43,7 @@ def test_predict_risk_returns_500_on_predictor_error(client, app, monkeypatch):
     # Force an error from the predictor
     def boom(*args, **kwargs):
         raise RuntimeError("simulated predictor failure")
-    monkeypatch.setattr(mod.predictor, "predict_patient_risk", boom)
+    monkeypatch.setattr(mod.get_predictor(), "predict_patient_risk", boom)
 
     payload = [{"name": "Alice", "age": 60, "gender": "female", "conditions_dict": {"pain": True}}]
     r = client.post("/risk/predict", json=payload)
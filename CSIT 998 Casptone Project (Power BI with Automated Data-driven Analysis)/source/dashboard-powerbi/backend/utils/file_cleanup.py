@@ -27,6 +27,11 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _age_hours(mtime: float, now: float) -> float:
+    """Age in hours of a file with the given mtime, relative to a shared now."""
+    return (now - mtime) / 3600
+
+
 def get_file_age_hours(filepath: Path) -> float:
     """Calculate file age in hours.
     
@@ -37,9 +42,7 @@ def get_file_age_hours(filepath: Path) -> float:
         Age of file in hours
     """
     try:
-        mtime = os.path.getmtime(filepath)
-        age_seconds = time.time() - mtime
-        return age_seconds / 3600
+        return _age_hours(os.path.getmtime(filepath), time.time())
     except Exception as e:
         logger.error(f"Error getting file age for {filepath}: {e}")
         return 0
@@ -56,9 +59,16 @@ def get_directory_size_mb(directory: Path) -> float:
     """
     total_size = 0
     try:
-        for entry in directory.rglob('*'):
-            if entry.is_file():
-                total_size += entry.stat().st_size
+        # os.scandir yields DirEntry objects whose type comes from the
+        # directory listing, so only files cost a stat() call
+        pending = [directory]
+        while pending:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        total_size += entry.stat().st_size
     except Exception as e:
         logger.error(f"Error calculating directory size: {e}")
     
@@ -94,19 +104,30 @@ def cleanup_old_files(
     space_freed = 0.0
     
     try:
-        for filepath in directory.iterdir():
-            if not filepath.is_file():
-                continue
+        now = time.time()
+        # Listed up front (as iterdir() did) so deleting doesn't disturb the scan
+        with os.scandir(directory) as it:
+            entries = [entry for entry in it if entry.is_file()]
+        
+        for entry in entries:
+            filepath = Path(entry.path)
             
             # Skip .gitkeep files
-            if filepath.name == '.gitkeep':
+            if entry.name == '.gitkeep':
                 files_kept += 1
                 continue
             
-            age_hours = get_file_age_hours(filepath)
+            # One stat() per file serves both the age check and the size
+            try:
+                st = entry.stat()
+            except OSError as e:
+                logger.error(f"Error getting file age for {filepath}: {e}")
+                files_kept += 1
+                continue
+            age_hours = _age_hours(st.st_mtime, now)
             
             if age_hours > max_age_hours:
-                file_size = filepath.stat().st_size
+                file_size = st.st_size
                 
                 if dry_run:
                     logger.info(f"[DRY RUN] Would delete: {filepath.name} (age: {age_hours:.1f}h, size: {file_size / 1024:.1f} KB)")
@@ -159,17 +180,20 @@ def cleanup_by_size_limit(
     
     # Get all files sorted by modification time (oldest first)
     files = []
-    for filepath in directory.iterdir():
-        if filepath.is_file() and filepath.name != '.gitkeep':
-            files.append((filepath, filepath.stat().st_mtime, filepath.stat().st_size))
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and entry.name != '.gitkeep':
+                st = entry.stat()
+                files.append((Path(entry.path), st.st_mtime, st.st_size))
     
     files.sort(key=lambda x: x[1])  # Sort by mtime
     
     files_deleted = 0
     space_freed = 0.0
+    remaining_mb = current_size  # updated as files are deleted
     
     for filepath, mtime, size in files:
-        if current_size - (space_freed / (1024 * 1024)) <= max_size_mb:
+        if remaining_mb <= max_size_mb:
             break
         
         if dry_run:
@@ -179,6 +203,7 @@ def cleanup_by_size_limit(
                 filepath.unlink()
                 files_deleted += 1
                 space_freed += size
+                remaining_mb -= size / (1024 * 1024)
                 logger.info(f"Deleted (size limit): {filepath.name}")
             except Exception as e:
                 logger.error(f"Failed to delete {filepath}: {e}")
@@ -215,14 +240,16 @@ def get_cleanup_stats(directory: Path) -> dict:
     files_over_24h = 0
     files_over_7d = 0
     
-    for filepath in directory.iterdir():
-        if not filepath.is_file() or filepath.name == '.gitkeep':
-            continue
-        
+    now = time.time()
+    with os.scandir(directory) as it:
+        entries = [entry for entry in it if entry.is_file() and entry.name != '.gitkeep']
+    
+    for entry in entries:
+        st = entry.stat()
         total_files += 1
-        total_size += filepath.stat().st_size
+        total_size += st.st_size
         
-        age_hours = get_file_age_hours(filepath)
+        age_hours = _age_hours(st.st_mtime, now)
         oldest_age = max(oldest_age, age_hours)
         
         if age_hours > 24:
@@ -0,0 +1,26 @@
+"""
+JSON response class backed by orjson.
+
+- Serializes NumPy scalars/arrays natively
+- Only routes that return NumpyJSONResponse(...) directly skip FastAPI's
+  jsonable_encoder (as risk_routes and cluster_usage_routes do). A route
+  returning a plain dict is still run through jsonable_encoder first,
+  which rejects NumPy scalars, even with this class as the default
+- Used as the app's default_response_class, where it just swaps in orjson
+  for rendering already-encoded content
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (C encoder, NumPy-aware)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
@@ -1,14 +1,20 @@
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+import queue
+import re
+import sys
 import threading
 
 import pandas as pd
 import pymysql
+from pymysql.constants import CLIENT
 
 from config import load_db_config
 from services import cluster_usage  # models and interpretations
-from services.model_usage import SVDNutritionalRiskPredictor
+from services.model_usage import get_predictor  # lazy predictor singleton, re-exported for routes
 
 
 # Upload directory and image paths
@@ -37,17 +43,68 @@ EXPECTED_COLUMNS: List[str] = [
 ]
 
 
+# Deletes spaces, underscores and hyphens in a single translate() pass
+_NORMALIZE_TBL = str.maketrans("", "", " _-")
+
+
+# Interned so that spellings normalizing to the same key ("Start date",
+# "start_date") share one object and dict lookups match on identity
+@lru_cache(maxsize=4096)
 def normalize_name(name: str) -> str:
     if name is None:
         return ""
-    return (
-        str(name).strip().lower().replace(" ", "").replace("_", "").replace("-", "")
-    )
+    return sys.intern(str(name).strip().lower().translate(_NORMALIZE_TBL))
+
+
+# Idle connections kept for reuse; LIFO so the most recently used socket is
+# handed out first and rarely-needed extras age out on the MySQL side
+DB_POOL_SIZE = 8
+_db_pool: "queue.LifoQueue" = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+
+class _PooledConnection:
+    """pymysql connection whose close() returns the socket to the pool"""
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            # Never hand an open transaction to the next caller
+            conn.rollback()
+            _db_pool.put_nowait(conn)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
 
 
 def get_db_connection():
+    while True:
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            conn.ping(reconnect=True)  # MySQL may have dropped an idle socket
+            return _PooledConnection(conn)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
     cfg = load_db_config()
-    return pymysql.connect(
+    return _PooledConnection(pymysql.connect(
         host=cfg.host,
         port=cfg.port,
         user=cfg.user,
@@ -56,7 +113,16 @@ def get_db_connection():
         charset='utf8mb4',
         autocommit=False,
         cursorclass=pymysql.cursors.DictCursor,
-    )
+        local_infile=cfg.local_infile,
+    ))
+
+
+def bulk_load_enabled() -> bool:
+    """Whether imports may stream rows with LOAD DATA LOCAL INFILE"""
+    try:
+        return load_db_config().local_infile
+    except RuntimeError:
+        return False
 
 
 def ensure_database_exists() -> None:
@@ -99,10 +165,22 @@ def ensure_schema_initialized(sql_file: Optional[Path] = None) -> None:
     # Ensure target database exists first
     ensure_database_exists()
 
+    cfg = load_db_config()
     conn = None
     cur = None
     try:
-        conn = get_db_connection()
+        # Dedicated (unpooled) connection that accepts a whole script per execute()
+        conn = pymysql.connect(
+            host=cfg.host,
+            port=cfg.port,
+            user=cfg.user,
+            password=cfg.password,
+            database=cfg.database,
+            charset='utf8mb4',
+            autocommit=False,
+            cursorclass=pymysql.cursors.DictCursor,
+            client_flag=CLIENT.MULTI_STATEMENTS,
+        )
         cur = conn.cursor()
 
         # Check existing tables in current database
@@ -117,12 +195,15 @@ def ensure_schema_initialized(sql_file: Optional[Path] = None) -> None:
 
         sql_text = sql_path.read_text(encoding="utf-8")
 
-        # Naive split by semicolon; skip empty/whitespace-only statements
-        statements = [s.strip() for s in sql_text.split(";") if s.strip()]
-        for stmt in statements:
-            cur.execute(stmt)
+        # Ship the script in one round trip; the server parses statement
+        # boundaries, so semicolons inside string literals are safe. Draining
+        # the result sets surfaces an error raised by any later statement
+        cur.execute(sql_text)
+        while cur.nextset():
+            pass
 
         conn.commit()
+        invalidate_columns_cache()
         print(f"Database initialized from {sql_path}")
     except Exception as exc:
         if conn:
@@ -136,43 +217,118 @@ def ensure_schema_initialized(sql_file: Optional[Path] = None) -> None:
             conn.close()
 
 
+# Column list of `data` per database; the schema only changes through
+# ensure_schema_initialized, which drops the cache
+_columns_cache: Dict[Any, List[str]] = {}
+
+
+def invalidate_columns_cache() -> None:
+    _columns_cache.clear()
+
+
+def _plain_cursor(conn):
+    """Tuple-row cursor for metadata queries; skips building a dict per row"""
+    return conn.cursor(pymysql.cursors.Cursor)
+
+
 def get_db_columns(conn) -> List[str]:
-    cur = conn.cursor()
-    cur.execute("SHOW COLUMNS FROM `data`")
-    cols = [r['Field'] for r in cur.fetchall()]
-    cur.close()
-    return cols
+    key = getattr(conn, 'db', None)
+    cols = _columns_cache.get(key)
+    if cols is None:
+        cur = _plain_cursor(conn)
+        cur.execute(
+            "SELECT COLUMN_NAME FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = 'data' "
+            "ORDER BY ORDINAL_POSITION"
+        )
+        cols = [r[0] for r in cur.fetchall()]
+        cur.close()
+        if cols:
+            _columns_cache[key] = cols
+    return list(cols)
+
+
+# Normalized key -> expected column, built once (EXPECTED_COLUMNS is constant)
+_EXPECTED_BY_KEY = MappingProxyType({normalize_name(exp): exp for exp in EXPECTED_COLUMNS})
+
+
+# Keyed on the column tuple itself, so a changed schema or header row is simply
+# a new entry; callers get a copy since the cached dict is shared
+@lru_cache(maxsize=32)
+def _match_expected(cols: tuple) -> Dict[str, Optional[str]]:
+    """Map each expected column to the column in cols that normalizes to it"""
+    mapping: Dict[str, Optional[str]] = dict.fromkeys(EXPECTED_COLUMNS)
+    for c in cols:
+        exp = _EXPECTED_BY_KEY.get(normalize_name(c))
+        if exp is not None:
+            mapping[exp] = c  # later duplicates win, as with a dict built from cols
+    return mapping
 
 
 def map_expected_to_db_columns(db_cols: List[str]) -> Dict[str, Optional[str]]:
-    db_map = {normalize_name(c): c for c in db_cols}
-    mapping: Dict[str, Optional[str]] = {}
-    for exp in EXPECTED_COLUMNS:
-        key = normalize_name(exp)
-        mapping[exp] = db_map.get(key)
-    return mapping
+    return dict(_match_expected(tuple(db_cols)))
 
 
 def map_csv_headers_to_expected(csv_cols: List[str]) -> Dict[str, Optional[str]]:
-    csv_map = {normalize_name(c): c for c in csv_cols}
-    mapping: Dict[str, Optional[str]] = {}
-    for exp in EXPECTED_COLUMNS:
-        mapping[exp] = csv_map.get(normalize_name(exp))
-    return mapping
+    return dict(_match_expected(tuple(csv_cols)))
+
+
+def build_csv_to_db_mapping(csv_cols: List[str], db_cols: List[str]) -> Dict[str, str]:
+    """CSV header -> DB column for each expected column present on both sides,
+    in EXPECTED_COLUMNS order"""
+    csv_map = _match_expected(tuple(csv_cols))
+    db_map = _match_expected(tuple(db_cols))
+    return {
+        csv_map[exp]: db_map[exp]
+        for exp in EXPECTED_COLUMNS
+        if csv_map[exp] is not None and db_map[exp] is not None
+    }
+
+
+# Placeholder strings treated as empty. Every token starts with n/N, so a
+# first-character test skips the lower() copy for ordinary values
+_DATE_NULL_TOKENS = frozenset({"none", "nan", "null"})
+_RF_NULL_TOKENS = frozenset({"none", "no", "n/a", "na", "null"})
+
+_ISO_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# strptime formats grouped by the string shape they can match, so a value is
+# only tried against formats that fit instead of failing through all of them
+# (%d also accepts a space-padded day, hence "[ \d]?\d")
+_DATE_FORMATS_BY_SHAPE = (
+    (re.compile(r"\d{4}-\d{1,2}-[ \d]?\d"), ("%Y-%m-%d",)),
+    (re.compile(r"[ \d]?\d/\d{1,2}/\d{4}"), ("%d/%m/%Y", "%m/%d/%Y")),
+    (re.compile(r"[ \d]?\d-\d{1,2}-\d{4}"), ("%d-%m-%Y", "%m-%d-%Y")),
+)
 
 
 def parse_date_to_iso(value) -> Optional[str]:
     if value is None:
         return None
-    s = str(value).strip()
-    if s == "" or s.lower() in {"none", "nan", "null"}:
+    return _parse_date_str(value.strip() if isinstance(value, str) else str(value).strip())
+
+
+# Imports repeat the same visit dates across many rows; the cache key is the
+# normalized string so any input type that prints the same shares an entry
+@lru_cache(maxsize=4096)
+def _parse_date_str(s: str) -> Optional[str]:
+    if s == "" or (s[0] in "nN" and s.lower() in _DATE_NULL_TOKENS):
         return None
-    fmts = ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%m-%d-%Y"]
-    for f in fmts:
+    if _ISO_DATE_RE.fullmatch(s):
+        # Already in output form; only the calendar check is left to do
         try:
-            return datetime.strptime(s, f).date().isoformat()
-        except Exception:
-            pass
+            date.fromisoformat(s)
+            return s
+        except ValueError:
+            pass  # e.g. 2020-02-30: let the full chain below decide
+    for shape, fmts in _DATE_FORMATS_BY_SHAPE:
+        if shape.fullmatch(s):
+            for f in fmts:
+                try:
+                    return datetime.strptime(s, f).date().isoformat()
+                except ValueError:
+                    pass
+            break
     try:
         dt = pd.to_datetime(s, errors='coerce')
         if pd.isna(dt):
@@ -182,45 +338,65 @@ def parse_date_to_iso(value) -> Optional[str]:
         return None
 
 
+def parse_date_series(series: pd.Series) -> pd.Series:
+    """Column form of parse_date_to_iso: ISO strings, None where unparseable.
+
+    Each distinct value is parsed once and the results are broadcast back
+    with Series.map, so a column of N rows with K distinct dates costs K
+    parses instead of N.
+    """
+    lookup = {value: parse_date_to_iso(value) for value in series.dropna().unique()}
+    parsed = series.map(lookup, na_action='ignore')
+    # map() turns missing and None results into NaN; hand back real None
+    return parsed.astype(object).where(parsed.notna(), None)
+
+
 def normalize_token(token: str) -> str:
     return token.strip().lower() if isinstance(token, str) else str(token).strip().lower()
 
 
+# One comma-separated token, without surrounding whitespace: findall() yields
+# the stripped, non-empty items in a single scan
+_RF_TOKEN = re.compile(r'[^,\s][^,]*[^,\s]|[^,\s]')
+
+
 def parse_risk_factors(cell_value) -> list:
-    if cell_value is None:
+    if isinstance(cell_value, str):
+        text = cell_value.strip()
+    elif cell_value is None:
         return []
-    if isinstance(cell_value, (bytes, bytearray)):
+    elif isinstance(cell_value, (bytes, bytearray)):
         try:
-            cell_value = cell_value.decode('utf-8', errors='ignore')
+            text = cell_value.decode('utf-8', errors='ignore').strip()
         except Exception:
-            cell_value = str(cell_value)
-    text = str(cell_value).strip()
+            text = str(cell_value).strip()
+    else:
+        text = str(cell_value).strip()
     if not text:
         return []
-    if text.lower() in {'none', 'no', 'n/a', 'na', 'null'}:
+    if text[0] in 'nN' and text.lower() in _RF_NULL_TOKENS:
         return []
-    parts = [p.strip() for p in text.split(',')]
-    parts = [p for p in parts if p]
-    return parts
+    return _RF_TOKEN.findall(text)
 
 
-def ensure_models_loaded() -> None:
-    if not all([
-        cluster_usage.svd_model is not None,
-        cluster_usage.clustering_model is not None,
-        cluster_usage.rf_columns is not None
-    ]):
-        (svd, clu, rfs, interp) = cluster_usage.load_patient_models("patient_classifier_model.pkl")
-        if not all([svd, clu, rfs]):
-            raise RuntimeError("Models not loaded. Check pickle path/format.")
-        cluster_usage.svd_model = svd
-        cluster_usage.clustering_model = clu
-        cluster_usage.rf_columns = rfs
-        cluster_usage.cluster_interpretations = interp or {}
+def parse_risk_factors_series(series: pd.Series) -> pd.Series:
+    """Column form of parse_risk_factors: a token list per row, [] for missing.
 
-
-# Predictor singleton
-predictor = SVDNutritionalRiskPredictor()
-predictor.load_trained_components()
+    Like parse_date_series, each distinct cell is tokenized once; rows with
+    the same text share one list, so treat the results as read-only.
+    """
+    lookup = {value: parse_risk_factors(value) for value in series.dropna().unique()}
+    empty: list = []
+    return series.map(lambda value: lookup.get(value, empty))
 
 
+def ensure_models_loaded() -> None:
+    if cluster_usage._loaded:
+        return
+    models = cluster_usage.get_cluster_models("patient_classifier_model.pkl")
+    cluster_usage.svd_model = models.svd_model
+    cluster_usage.clustering_model = models.clustering_model
+    cluster_usage.rf_columns = models.rf_columns
+    cluster_usage.cluster_interpretations = models.cluster_interpretations
+    # Flip last so a concurrent caller never sees the flag before the models
+    cluster_usage._loaded = True
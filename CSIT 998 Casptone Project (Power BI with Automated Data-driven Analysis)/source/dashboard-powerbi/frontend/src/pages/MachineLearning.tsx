@@ -17,6 +17,19 @@ type ClusterPredictReq = { patient_id?: string; features: Record<string, any> };
 type ClusterPredictResp = any;
 type RiskPatient = { name: string; age: number; gender: string; conditions_dict: Record<string, any> };
 
+// Risk recommendations arrive as "[TAG] text"; icons are a display concern only
+const RECOMMENDATION_ICONS: Record<string, string> = {
+  URGENT: '🚨', DIET: '🍎', MONITOR: '📊', SUPPLEMENT: '💊', TEAM: '👥', ALERT: '⚠️',
+  INTAKE: '🍽️', ASSESS: '📋', AWARENESS: '👀', ROUTINE: '✅', SCHEDULE: '📅',
+};
+
+function formatRecommendation(text: string): string {
+  const match = /^\[([A-Z]+)\]\s*/.exec(text);
+  if (!match) return text;
+  const icon = RECOMMENDATION_ICONS[match[1]];
+  return icon ? `${icon} ${text.slice(match[0].length)}` : text;
+}
+
 export default function MachineLearning() {
   const [rfColumns, setRfColumns] = useState<string[]>([]);
   const [features, setFeatures] = useState<Record<string, number>>({});
@@ -641,7 +654,7 @@ export default function MachineLearning() {
                       <ul style={{ paddingLeft: 20, margin: 0, fontSize: 14, lineHeight: 1.8 }}>
                         {riskResult[0].recommendations.map((r: string, i: number) => (
                           <li key={i} style={{ marginBottom: 12 }}>
-                            <Typography.Text strong={i === 0}>{r}</Typography.Text>
+                            <Typography.Text strong={i === 0}>{formatRecommendation(r)}</Typography.Text>
                           </li>
                         ))}
                       </ul>